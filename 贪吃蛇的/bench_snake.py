@@ -0,0 +1,341 @@
+"""
+性能基准（无头运行，不需要 pygame 窗口）。
+
+    python bench_snake.py
+"""
+import time
+
+from snake_autopilot import Autopilot, hamiltonian_cycle
+from snake_core import BIG_COLS, BIG_PLAY, BIG_ROWS, GRID, PLAY, Bounds, Settings, SnakeGame
+from snake_sim import SimThread
+
+BENCH_COLS, BENCH_ROWS = 40, 40
+
+
+def game_with_length(length, cols=BENCH_COLS, rows=BENCH_ROWS):
+    play = Bounds(0, 0, cols * GRID, rows * GRID)
+    g = SnakeGame(Settings(wrap=True, obstacles=False, level_mode=False), play=play, seed=0)
+    path = [(c * GRID, r * GRID) for c, r in hamiltonian_cycle(cols, rows)]
+    while g.snake:
+        g.pop_tail()
+    for cell in path[:length]:
+        g.push_head(cell)
+    # 食物/道具放到棋盘外，长度保持不变
+    g.food = (-GRID, -GRID)
+    g.powerup = ("bonus", (-GRID, -GRID))
+    g.start()
+    return g, path
+
+
+def bench_step_by_length(lengths=None, ticks=20000):
+    cols, rows = BENCH_COLS, BENCH_ROWS
+    full = cols * rows - 1
+    lengths = lengths or [1, 10, 100, 500, full // 2, full]
+    print(f"SnakeGame.step on {cols}x{rows} board (full = {full} cells)")
+    for length in lengths:
+        g, path = game_with_length(length, cols, rows)
+        n = len(path)
+        i = length - 1
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            hx, hy = path[i % n]
+            nx, ny = path[(i + 1) % n]
+            g.dir = ((nx - hx) // GRID, (ny - hy) // GRID)
+            g.step()
+            i += 1
+        dt = time.perf_counter() - t0
+        assert not g.game_over and len(g.snake) == length
+        print(f"  length {length:>5}: {dt / ticks * 1e6:6.2f} us/tick")
+
+
+def bench_vec(n_envs=(1, 64, 1024, 4096), ticks=200):
+    import numpy as np
+    from snake_vec import VecSnake
+
+    print("VecSnake.step, random actions")
+    for n in n_envs:
+        env = VecSnake(n, Settings(), seed=0)
+        rng = np.random.default_rng(0)
+        actions = rng.integers(-1, 4, size=(ticks, n))
+        t0 = time.perf_counter()
+        for a in actions:
+            env.step(a)
+        dt = time.perf_counter() - t0
+        print(f"  {n:>5} envs: {dt / ticks * 1e3:7.3f} ms/step, {n * ticks / dt:12,.0f} env-ticks/s")
+
+
+def check_vec_lockstep(ticks=10000, seed=0):
+    """
+    VecSnake 和 SnakeGame 逐 tick 对拍，不一致就抛 AssertionError。
+    两边的随机数各用各的，所以每步之前把 VecSnake 的食物 / 道具 / 障碍摆到 SnakeGame 上，再给同一个动作；
+    之后比蛇身、占用计数、分数、等级、速度、时钟、buff，以及这一步前的食物 / 道具是不是都被吃掉了。
+    动作九成朝食物走（好吃到东西、升级、捡道具），其余随机。
+    """
+    import random
+
+    import numpy as np
+    from snake_vec import DIRS, POWERUP_KINDS, VecSnake
+
+    print("VecSnake vs SnakeGame lockstep")
+    for k, settings in enumerate((Settings(obstacles=True), Settings(wrap=True, obstacles=True, difficulty="Insane"),
+                                  Settings(obstacles=False, level_mode=False))):
+        v = VecSnake(1, settings, seed=seed + k)
+        g = SnakeGame(settings, seed=seed + k)
+        g.start()
+        play, cols = g.play, v.cols
+        rnd = random.Random(seed + k)
+
+        def cell(i):
+            return play.x + (i % cols) * GRID, play.y + (i // cols) * GRID
+
+        deaths = eaten = picked = 0
+        for tick in range(ticks):
+            # 共享摆放
+            g.food = cell(v.food[0]) if v.food[0] >= 0 else None
+            g.clear_obstacles()
+            for i in np.flatnonzero(v.obst[0]):
+                g.add_obstacle(cell(i))
+            g.powerup = (POWERUP_KINDS[v.pu_kind[0]], cell(v.pu_cell[0])) if v.pu_kind[0] >= 0 else None
+            food, powerup = g.food, g.powerup
+
+            a = -1
+            if food and rnd.random() < 0.9:
+                hx, hy = g.snake[0]
+                best = None
+                for j, (dx, dy) in enumerate(DIRS):
+                    c = (hx + dx * GRID, hy + dy * GRID)
+                    if (dx, dy) == (-g.dir[0], -g.dir[1]) or c in g.occupied or c in g.obstacles or not g.on_board(c):
+                        continue
+                    d = abs(c[0] - food[0]) + abs(c[1] - food[1])
+                    if best is None or d < best[0]:
+                        best = (d, j)
+                if best:
+                    a = best[1]
+            else:
+                a = rnd.choice((-1, 0, 1, 2, 3))
+            if a >= 0:
+                g.set_dir(*DIRS[a])
+            before = g.score
+            reward, dead = v.step([a])
+            g.step()
+
+            where = f"settings #{k}, tick {tick}"
+            assert bool(dead[0]) == g.game_over, f"{where}: death {bool(dead[0])} vs {g.game_over}"
+            if g.game_over:
+                assert v.final_score[0] == g.score, f"{where}: final score {v.final_score[0]} vs {g.score}"
+                deaths += 1
+                g.reset()
+                g.start()
+                continue
+            assert reward[0] == g.score - before, f"{where}: reward {reward[0]} vs {g.score - before}"
+            counters = int(v.score[0]), int(v.level[0]), int(v.grow[0])
+            assert counters == (g.score, g.level, g.grow), \
+                f"{where}: score/level/grow {counters} vs {(g.score, g.level, g.grow)}"
+            assert abs(v.tick_rate[0] - g.tick_rate) < 1e-9 and abs(v.t[0] - g.t) < 1e-9, f"{where}: rate/clock"
+            ptr, length = int(v.ptr[0]), int(v.length[0])
+            body = [(play.x + int(v.ring_c[0, (ptr - i) % v.cap]) * GRID,
+                     play.y + int(v.ring_r[0, (ptr - i) % v.cap]) * GRID) for i in range(length)]
+            assert body == list(g.snake), f"{where}: body differs"
+            occupied = {cell(i): int(c) for i, c in enumerate(v.body[0]) if c}
+            assert occupied == {c: n for c, n in g.occupied.items() if g.on_board(c)}, f"{where}: occupancy differs"
+            # 吃掉的食物原地不会再刷出来（那格现在是蛇头），所以“食物还在不在原处”两边必须一致
+            ate = v.food[0] < 0 or cell(v.food[0]) != food
+            assert ate == (g.food != food), f"{where}: food eaten {ate} vs {g.food != food}"
+            eaten += ate
+            if powerup:
+                gone = v.pu_kind[0] < 0 or cell(v.pu_cell[0]) != powerup[1]
+                assert gone == (g.powerup != powerup), f"{where}: powerup taken {gone} vs {g.powerup != powerup}"
+                picked += gone
+            for b, name in enumerate(g.buffs.NAMES):
+                on = bool(v.t[0] < v.buff_until[0, b])
+                assert on == getattr(g.buffs, name), f"{where}: buff {name} {on} vs {getattr(g.buffs, name)}"
+                if on:
+                    assert abs(v.buff_until[0, b] - g.buffs.until[name]) < 1e-9, f"{where}: buff {name} end"
+        print(f"  settings #{k}: {ticks} ticks in lockstep ({deaths} deaths, {eaten} food, {picked} powerups)")
+
+
+def timer_noise(samples):
+    # 同样次数地计时一段固定的几微秒小计算，取最大值（毫秒）：机器本身的调度抖动，decide 的 max 离不开这个底
+    most = 0.0
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        sum(range(100))
+        most = max(most, time.perf_counter() - t0)
+    return most * 1e3
+
+
+def wall_in_food(g):
+    # 食物四周放上障碍：A* 永远找不到路，自动驾驶每一步都在追尾兜底
+    fx, fy = g.food
+    for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+        cell = (fx + dx * GRID, fy + dy * GRID)
+        if g.on_board(cell) and cell not in g.occupied:
+            g.add_obstacle(cell)
+
+
+def bench_autopilot(games=4, max_ticks=20000, big_ticks=3000, target=1.0):
+    # 每个 tick 的决策耗时分布，有障碍 / 无障碍 / 食物被围住各跑几局；p99 和最大值都对照单步 target 毫秒的预算
+    for name, play, ticks in (("default board", PLAY, max_ticks), ("big board", BIG_PLAY, big_ticks)):
+        print(f"Autopilot.decide, {name} (target {target:.1f} ms)")
+        for obstacles in (True, False, "walled"):
+            times = []
+            for k in range(games):
+                g = SnakeGame(Settings(obstacles=obstacles is True), play=play, seed=k)
+                if obstacles == "walled":
+                    wall_in_food(g)
+                g.pilot = Autopilot(g)
+                g.start()
+                while not g.game_over and g.ticks < ticks:
+                    g.step()
+                    times.append(g.pilot.decide_time * 1e3)
+            times.sort()
+            n = len(times)
+            p50, p99, most = times[n // 2], times[int(n * 0.99)], times[-1]
+            over = sum(t > target for t in times)
+            verdict = "ok" if most <= target else ("p99 ok, max over" if p99 <= target else "OVER")
+            print(f"  obstacles={obstacles!s:<6}: {n:>6} ticks, p50 {p50:.3f} ms, p99 {p99:.3f} ms, "
+                  f"max {most:.3f} ms, {over} over target  {verdict}")
+            print(f"  {'':<17}  same number of fixed tiny workloads: max {timer_noise(n):.3f} ms")
+
+
+def load_app():
+    # 用 dummy 显示驱动无窗口地创建 App，供渲染基准使用
+    import importlib
+    import os
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    ui = importlib.import_module("贪吃蛇4")
+    return ui, ui.App()
+
+
+def bench_render(frames=300):
+    ui, app = load_app()
+    print("App.render per frame (dummy display)")
+    for cached in (False, True):
+        for cache, capacity in ((ui.GLOW_CACHE, 128), (ui.TEXT_CACHE, 256)):
+            cache.capacity = capacity if cached else 0
+            cache.items.clear()
+            cache.hits = cache.misses = 0
+        for scene in ("menu", "game"):
+            if scene == "game":
+                app.play()
+            else:
+                app.scene = scene
+                app.build_ui()
+            t0 = time.perf_counter()
+            for _ in range(frames):
+                app.render()
+            dt = time.perf_counter() - t0
+            print(f"  caches {'on ' if cached else 'off'}  {scene:<5}: {dt / frames * 1e3:6.2f} ms/frame")
+        print(f"  glow cache hit rate: {ui.GLOW_CACHE.hit_rate:.1%}, text cache hit rate: {ui.TEXT_CACHE.hit_rate:.1%}")
+
+
+def draw_cells_rects(ui, screen, g):
+    # 贴图集之前的画法：每个格子单独 draw.rect（带圆角），用作对照
+    for ox, oy in g.obstacles:
+        r = (ox, oy, GRID, GRID)
+        ui.pygame.draw.rect(screen, ui.SKIN["obstacle"], r, border_radius=6)
+        ui.pygame.draw.rect(screen, ui.SKIN["obstacle_edge"], r, width=2, border_radius=6)
+    for name, cell in (("food", g.food), (g.powerup[0], g.powerup[1])):
+        col = ui.SKIN.get(name, ui.SKIN["double"])
+        ui.draw_glow_rect(screen, (*cell, GRID, GRID), col, radius=10, glow=10, alpha=90)
+        ui.pygame.draw.rect(screen, col, (*cell, GRID, GRID), border_radius=10)
+    hx, hy = g.snake[0]
+    ui.draw_glow_rect(screen, (hx, hy, GRID, GRID), ui.SKIN["head"], radius=10, glow=12, alpha=90)
+    ui.pygame.draw.rect(screen, ui.SKIN["head"], (hx, hy, GRID, GRID), border_radius=10)
+    for i, (sx, sy) in enumerate(g.snake):
+        if i:
+            ui.pygame.draw.rect(screen, ui.SKIN["body"], (sx, sy, GRID, GRID), border_radius=8)
+
+
+def bench_atlas(lengths=(10, 500, 1500), frames=200):
+    # 50x32 的棋盘正好放进窗口，能容下 1500 节；再摆 60 个障碍
+    ui, app = load_app()
+    app.play()
+    print("Snake/obstacle/food layers per frame: draw.rect vs tile atlas + blits")
+    for length in lengths:
+        g, path = game_with_length(length, cols=50, rows=32)
+        g.obstacles = set(path[length + 2:length + 62])
+        g.food, g.powerup = path[length], ("slow", path[length + 1])
+        g.prev_head, g.prev_tail = g.snake[0], None
+        # 棋盘不是 PLAY 时 draw_cells 会走大地图的摄像机（偏移 + 裁剪 + 视口剔除）；
+        # 这里要比的是格子按原坐标整盘画，所以让它按 PLAY 处理，和 draw.rect 的对照画法一致
+        g.play = ui.PLAY
+        app.game = g
+        app.settings.obstacles = True
+        # 先各画一次比对像素，再分别计时
+        screen = app.screen
+        ref, app.screen = screen.copy(), screen.copy()
+        draw_cells_rects(ui, ref, g)
+        app.draw_cells(g)
+        same = ui.pygame.image.tostring(app.screen, "RGB") == ui.pygame.image.tostring(ref, "RGB")
+        app.screen = screen
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            draw_cells_rects(ui, app.screen, g)
+        t_rects = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            app.draw_cells(g)
+        t_atlas = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            app.render()
+        t_frame = time.perf_counter() - t0
+        print(f"  len {length:5d}: rects {t_rects / frames * 1e3:6.2f} ms, atlas {t_atlas / frames * 1e3:6.2f} ms"
+              f" ({t_rects / t_atlas:4.1f}x, {'same pixels' if same else 'PIXELS DIFFER'}),"
+              f" full frame {t_frame / frames * 1e3:6.2f} ms")
+
+
+def bench_big_board(lengths=(10, 1500, 20000), frames=200):
+    # 大地图只画视口里的格子：蛇再长、棋盘再大，每帧开销也只跟窗口大小有关
+    ui, app = load_app()
+    app.play()
+    app.settings.obstacles = True
+    print(f"draw_cells on a {BIG_COLS}x{BIG_ROWS} board (follow camera, viewport culling)")
+    for length in lengths:
+        g, path = game_with_length(length, cols=BIG_COLS, rows=BIG_ROWS)
+        g.obstacles = set(path[length + 2:length + 2002])
+        g.food, g.powerup = path[length], ("slow", path[length + 1])
+        g.prev_head, g.prev_tail = g.snake[0], None
+        app.game = g
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            app.draw_cells(g)
+        dt = time.perf_counter() - t0
+        print(f"  len {length:5d}: {dt / frames * 1e3:6.2f} ms/frame")
+
+
+def bench_sim_thread(loads=(0.002, 0.012), seconds=3.0, fps=60):
+    # 模拟线程的节拍误差：渲染线程每帧占着 GIL 跑 load 秒纯 Python，再睡到下一帧；
+    # 每帧开始前让不让路（yield_to_tick）各测一遍
+    print("SimThread tick jitter under a pure-Python render load (p50 / p99 / max, ms)")
+    for load in loads:
+        for coop in (False, True):
+            g, _ = game_with_length(10)
+            g.tick_rate = 50.0
+            sim = SimThread(g).start()
+            end = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                if coop:
+                    sim.yield_to_tick(load + 0.001)
+                t0 = time.perf_counter()
+                while time.perf_counter() - t0 < load:
+                    sum(range(200))
+                time.sleep(max(0.0, 1.0 / fps - load))
+            sim.stop()
+            p50, p99, most = sim.jitter_stats()
+            print(f"  render {load * 1e3:4.1f} ms  yield {'on ' if coop else 'off'}: "
+                  f"{p50:6.3f} / {p99:6.3f} / {most:6.3f}  ({len(sim.jitter)} ticks)")
+
+
+if __name__ == "__main__":
+    bench_step_by_length()
+    check_vec_lockstep()
+    bench_vec()
+    bench_autopilot()
+    bench_render()
+    bench_atlas()
+    bench_big_board()
+    bench_sim_thread()
@@ -0,0 +1,458 @@
+"""
+自动驾驶：A* 寻路吃食物 + 蛇尾可达安全检查 + 哈密顿回路兜底。
+
+    python snake_autopilot.py 20      # 无头跑 20 局做浸泡测试，打印分数与单步决策耗时
+"""
+import heapq
+import sys
+import time
+from collections import deque
+
+from snake_core import GRID, Settings, SnakeGame
+
+# 方向：上 下 左 右
+DIRS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+FAR = 1 << 30  # 还没走到过的格子
+
+
+def hamiltonian_cycle(cols, rows):
+    """
+    覆盖整个棋盘的回路，返回 (列, 行) 列表；行列都是奇数时不存在，返回 None。
+    行数为偶数：第 0 列向上回到起点，其余列逐行蛇形往返；列数为偶数时转置构造。
+    """
+    if cols < 2 or rows < 2:
+        return None
+    if rows % 2:
+        if cols % 2:
+            return None
+        return [(c, r) for r, c in hamiltonian_cycle(rows, cols)]
+    cells = []
+    for r in range(rows):
+        cs = range(1, cols) if r % 2 == 0 else range(cols - 1, 0, -1)
+        cells += [(c, r) for c in cs]
+    cells += [(0, r) for r in range(rows - 1, -1, -1)]
+    return cells
+
+
+class Manhattan:
+    """
+    大棋盘上代替 BFS 距离场的启发值：到食物的曼哈顿距离（穿墙时取环面距离），取值时才算。
+    和距离场一样用下标取值，A* 不用区分两种情况；有障碍时它偏乐观，A* 多展开一些但结果仍然最短。
+    每列、每行到食物的距离先各算一遍，取值只是两次查表相加。
+    """
+
+    def __init__(self, goal, cols, rows, wrap):
+        gc, gr = goal % cols, goal // cols
+        self.cols = cols
+        self.dc = [self._axis(abs(c - gc), cols, wrap) for c in range(cols)]
+        self.dr = [self._axis(abs(r - gr), rows, wrap) for r in range(rows)]
+
+    @staticmethod
+    def _axis(d, size, wrap):
+        return min(d, size - d) if wrap else d
+
+    def __getitem__(self, i):
+        r, c = divmod(i, self.cols)
+        return self.dc[c] + self.dr[r]
+
+
+class Autopilot:
+    """
+    每个 tick 在 SnakeGame.step 之前调用 decide()，通过 set_dir 转向（会照常记进回放）。
+    格子用整数下标 r * cols + c，邻接表预先算好（分穿墙 / 不穿墙两套）。
+    - 食物距离场：从食物出发的 BFS，只在食物、障碍或穿墙状态变化时重算，作为 A* 的启发值；
+      超过 FIELD_MAX 格的大棋盘每个食物整片 BFS 太贵，改用 Manhattan；
+    - 蛇身：记录每格被蛇头进入时的序号，“还要几步才空出来”由序号 O(1) 算出，随蛇移动增量更新；
+    - 规划出的路径会一直沿用到走完或失效，中途不重新搜索；
+    - 每次 A* 最多展开 EXPAND_MAX 个节点，单步决策压在 1 ms 以内；超了就先追尾，隔 RETRY 步再搜；
+    - 无障碍且存在哈密顿回路时，每一步都保持回路顺序（不越过蛇尾），保证吃满棋盘前不会死。
+    """
+
+    RETRY = 8   # 找不到安全路径、改为追尾时，每隔几步再试一次寻路
+    STALL = 2   # 追尾绕了 STALL * 格子数 步还没吃到，就接受不安全的路径（食物在死角里时避免无限兜圈）
+    FIELD_MAX = 4096  # 超过这么多格就不再为每个食物做整片 BFS
+    EXPAND_MAX = 600  # 每次 A* / 安全检查最多展开的格子数，把单步决策压在 1 ms 以内
+
+    _boards = {}  # (cols, rows) -> 邻接表和回路顺序；只读，同一尺寸的棋盘共用
+
+    def __init__(self, game: SnakeGame):
+        self.game = game
+        play = game.play
+        self.cols, self.rows = play.cols, play.rows
+        self.n = self.cols * self.rows
+        self.nbrs, self.nbrs_wrap, self.adj, self.adj_wrap, self.order = self._board(self.cols, self.rows)
+
+        self.field = None
+        self.field_key = None
+        self.fed_at = 0
+        self.blocked = [False] * self.n
+        # entry[i]：蛇头进入该格时的序号；再过 entry[i] + base 步才空出来（见 _base）
+        self.entry = [-self.n] * self.n
+        self.entered = 0
+        self.seen_ticks = None
+        self.seen_seed = None
+
+        self.plan = deque()
+        self.plan_key = None
+        self.chasing = False
+        self.retry = 0
+        self.back = None         # 这一步不能走的方向（掉头）；静止时为 None
+        self.behind = -1         # 掉头会走到的格子
+        self.decide_time = 0.0   # 上一次 decide 的耗时（秒）
+
+    # -------- 网格 --------
+    @classmethod
+    def _board(cls, cols, rows):
+        board = cls._boards.get((cols, rows))
+        if board is None:
+            nbrs = cls._neighbours(cols, rows, wrap=False)
+            nbrs_wrap = cls._neighbours(cols, rows, wrap=True)
+            adj = [[j for j, _ in lst] for lst in nbrs]
+            adj_wrap = [[j for j, _ in lst] for lst in nbrs_wrap]
+            cycle = hamiltonian_cycle(cols, rows)
+            order = None
+            if cycle:
+                order = [0] * (cols * rows)
+                for k, (c, r) in enumerate(cycle):
+                    order[r * cols + c] = k
+            board = cls._boards[(cols, rows)] = (nbrs, nbrs_wrap, adj, adj_wrap, order)
+        return board
+
+    @staticmethod
+    def _neighbours(cols, rows, wrap):
+        # 按 DIRS 的顺序给出每格的 (邻格, 方向)；先整列算出四个方向的邻格（出界记 -1），大棋盘上比逐格逐方向快得多
+        n = cols * rows
+        cells = range(n)
+        if wrap:
+            steps = ([(i - cols) % n for i in cells], [(i + cols) % n for i in cells],
+                     [i - 1 if i % cols else i + cols - 1 for i in cells],
+                     [i + 1 if (i + 1) % cols else i + 1 - cols for i in cells])
+        else:
+            steps = ([i - cols if i >= cols else -1 for i in cells], [i + cols if i + cols < n else -1 for i in cells],
+                     [i - 1 if i % cols else -1 for i in cells], [i + 1 if (i + 1) % cols else -1 for i in cells])
+        return [[(j, d) for d, j in enumerate(js) if j >= 0] for js in zip(*steps)]
+
+    def index(self, cell):
+        play = self.game.play
+        c = (cell[0] - play.x) // GRID
+        r = (cell[1] - play.y) // GRID
+        if 0 <= c < self.cols and 0 <= r < self.rows:
+            return r * self.cols + c
+        return None
+
+    # -------- 增量状态 --------
+    def _sync_body(self):
+        # 正常情况下每个 tick 只多了一个新蛇头；对不上（刚接管/重开）时整条重建一次
+        g = self.game
+        if g.seed == self.seen_seed and g.ticks == self.seen_ticks + 1:
+            self.entered += 1
+            i = self.index(g.snake[0])
+            if i is not None:
+                self.entry[i] = self.entered
+        elif g.seed != self.seen_seed or g.ticks != self.seen_ticks:
+            self.entry = [-self.n] * self.n
+            self.entered = len(g.snake) - 1
+            for k, cell in enumerate(reversed(g.snake)):
+                i = self.index(cell)
+                if i is not None:
+                    self.entry[i] = k
+            self.plan.clear()
+        self.seen_ticks = g.ticks
+        self.seen_seed = g.seed
+
+    def _base(self):
+        # 该格还要 entry[i] + base 步才空出来；第 t 步能进入当且仅当 t > entry[i] + base
+        g = self.game
+        return len(g.snake) + g.grow - self.entered
+
+    def _food_field(self):
+        g = self.game
+        key = (g.seed, g.food, g.level, g.effective_wrap())
+        if key == self.field_key:
+            return
+        self.field_key = key
+        self.fed_at = g.ticks
+        self.blocked = [False] * self.n
+        for cell in g.obstacles:
+            i = self.index(cell)
+            if i is not None:
+                self.blocked[i] = True
+        self.field = None
+        f = self.index(g.food) if g.food else None
+        if f is None:
+            return
+        if self.n > self.FIELD_MAX:
+            self.field = Manhattan(f, self.cols, self.rows, key[3])
+            return
+        adj = self.adj_wrap if key[3] else self.adj
+        blocked = self.blocked
+        dist = [-1] * self.n
+        dist[f] = 0
+        q = deque([f])
+        while q:
+            i = q.popleft()
+            d = dist[i] + 1
+            for j in adj[i]:
+                if dist[j] < 0 and not blocked[j]:
+                    dist[j] = d
+                    q.append(j)
+        self.field = dist
+
+    # -------- 搜索 --------
+    def _astar(self, head, adj):
+        # 时间相关的 A*：第 t 步能进入某格当且仅当它在 t 步之前已空出；启发值取食物距离场。
+        # 最多展开 EXPAND_MAX 个节点，超了按没找到处理（调用方改为追尾，过几步再试）；
+        # best / parent 用字典，开销只跟展开的节点数有关，不随棋盘大小涨
+        dist = self.field
+        if dist is None or dist[head] < 0:
+            return None
+        goal = self.index(self.game.food)
+        blocked, entry, base = self.blocked, self.entry, self._base()
+        behind = self.behind
+        best = {head: 0}
+        parent = {}
+        budget = self.EXPAND_MAX
+        # f 相同时先展开走得更远的节点（-t），网格上大量平局时能少展开很多
+        heap = [(dist[head], 0, head)]
+        while heap:
+            _, t, i = heapq.heappop(heap)
+            t = -t
+            if i == goal:
+                path = []
+                while i != head:
+                    path.append(i)
+                    i = parent[i]
+                return path[::-1]
+            if t > best[i]:
+                continue
+            budget -= 1
+            if budget < 0:
+                return None
+            t += 1
+            for j in adj[i]:
+                if (t < best.get(j, FAR) and t > entry[j] + base and not blocked[j] and dist[j] >= 0
+                        and (i != head or j != behind)):
+                    best[j] = t
+                    parent[j] = i
+                    heapq.heappush(heap, (t + dist[j], -t, j))
+        return None
+
+    def _safe_after(self, path, adj):
+        # 沿路径吃到食物之后，新蛇头还能追上自己正在空出来的身体（即能一直跟着蛇尾走）；
+        # 和 _astar 一样最多看 EXPAND_MAX 格：看满了还没碰到蛇尾，说明能到的空格已经比整条蛇多，当作安全
+        g = self.game
+        body = [self.index(c) for c in g.snake]
+        body = (path[::-1] + body)[:len(body) + g.grow + 1]
+        if None in body:
+            return False
+        size = len(body) + 1
+        free_in = {}
+        for k in range(len(body) - 1, -1, -1):
+            free_in[body[k]] = size - k
+        blocked = self.blocked
+        seen = {body[0]}
+        budget = self.EXPAND_MAX
+        frontier, t = [body[0]], 0
+        while frontier:
+            t += 1
+            budget -= len(frontier)
+            if budget < 0:
+                return size < self.EXPAND_MAX
+            nxt = []
+            for i in frontier:
+                for j in adj[i]:
+                    if j in seen or blocked[j]:
+                        continue
+                    f = free_in.get(j, 0)
+                    if t > f:
+                        if f:
+                            return True
+                        seen.add(j)
+                        nxt.append(j)
+            frontier = nxt
+        return False
+
+    def _chase(self, head, nbrs, adj):
+        """
+        兜底：时间相关的 BFS，找到最近一个“到达时已经空出来”的蛇身格，返回去那里的路径（跟着蛇尾走）。
+        整片都追不上时返回 [邻格]：按第一步分组，取空间最大的方向。
+        和 _astar 一样最多看 EXPAND_MAX 格，看满了就按已经看到的空间大小选方向。
+        """
+        blocked, entry, base = self.blocked, self.entry, self._base()
+        parent = {head: head}
+        label = {}
+        size = [0] * 4
+        frontier = []
+        for j, d in nbrs[head]:
+            if d != self.back and not blocked[j] and 1 > entry[j] + base:
+                parent[j] = head
+                label[j] = d
+                size[d] = 1
+                frontier.append(j)
+        budget = self.EXPAND_MAX
+        t = 1
+        while frontier:
+            t += 1
+            budget -= len(frontier)
+            if budget < 0:
+                break
+            nxt = []
+            for i in frontier:
+                for j in adj[i]:
+                    if j in parent or blocked[j]:
+                        continue
+                    f = entry[j] + base
+                    if t > f:
+                        parent[j] = i
+                        if f > 0:
+                            path = [j]
+                            while i != head:
+                                path.append(i)
+                                i = parent[i]
+                            return path[::-1]
+                        label[j] = label[i]
+                        size[label[j]] += 1
+                        nxt.append(j)
+            frontier = nxt
+        best = max(range(4), key=size.__getitem__)
+        if not size[best]:
+            return None
+        return [j for j, d in nbrs[head] if d == best]
+
+    def _cycle_move(self, head, nbrs, adj):
+        # 回路顺序：身体始终按回路排列，回路后继只要空着就安全。
+        # 抄近路（跳过一段回路）不能越过食物，跳过之后到蛇尾前还要留够待成长的格子（吃一次长两节）；
+        # 蛇身过半后不再抄近路。A* 路径的下一步合法就走它，否则取合法范围内跳得最远的邻格。
+        g = self.game
+        order, n = self.order, self.n
+        at = order[head]
+        room = 2
+        if len(g.snake) < n // 2 and g.food:
+            gap = n if len(g.snake) == 1 else (order[self.index(g.snake[-1])] - at) % n
+            room = min(gap - g.grow - 3, (order[self.index(g.food)] - at) % n + 1)
+        # 每个食物只搜一次 A*；它的下一步一旦被回路规则否掉，就只靠回路近路走到这个食物
+        plan = self.plan
+        if room > 2 and self.plan_key != self.field_key:
+            self.plan_key = self.field_key
+            plan = self.plan = deque(self._astar(head, adj) or ())
+        first = plan[0] if room > 2 and plan else None
+        entry, base = self.entry, self._base()
+        best = None
+        for j, d in nbrs[head]:
+            ahead = (order[j] - at) % n
+            if d == self.back or ahead >= max(room, 2) or 1 <= entry[j] + base:
+                continue
+            if j == first:
+                plan.popleft()
+                return d
+            if best is None or ahead > best[0]:
+                best = (ahead, d)
+        plan.clear()
+        return best and best[1]
+
+    def _follow(self, head, nbrs, adj):
+        # 沿用上次规划的路径：下一格仍相邻且已空出就直接走，不重新搜索
+        plan = self.plan
+        if plan:
+            j = plan[0]
+            if (j != self.behind and j in adj[head] and not self.blocked[j]
+                    and 1 > self.entry[j] + self._base()):
+                plan.popleft()
+                return self._dir_to(head, j, nbrs)
+            plan.clear()
+        return None
+
+    def _path_move(self, head, nbrs, adj):
+        # 有去食物的路径就一直走完；否则追尾，每隔 RETRY 步（或食物/障碍/穿墙变化时）再试一次 A*
+        if self.plan_key != self.field_key:
+            self.plan_key = self.field_key
+            self.plan.clear()
+            self.retry = 0
+        if self.plan and not self.chasing:
+            move = self._follow(head, nbrs, adj)
+            if move is not None:
+                return move
+        if self.retry <= 0:
+            path = self._astar(head, adj)
+            stalled = self.game.ticks - self.fed_at > self.STALL * self.n
+            if path and (stalled or self._safe_after(path, adj)):
+                self.plan = deque(path)
+                self.chasing = False
+                return self._follow(head, nbrs, adj)
+            self.retry = self.RETRY
+        self.retry -= 1
+        move = self._follow(head, nbrs, adj) if self.chasing else None
+        if move is None:
+            path = self._chase(head, nbrs, adj)
+            if path:
+                self.plan = deque(path)
+                self.chasing = True
+                move = self._follow(head, nbrs, adj)
+        return move
+
+    def _step(self, head, d, nbrs):
+        # 从 head 朝方向 d 走一格到哪；走不出去（或 d 为 None）返回 -1
+        for j, e in nbrs[head]:
+            if e == d:
+                return j
+        return -1
+
+    def _dir_to(self, head, nxt, nbrs):
+        for j, d in nbrs[head]:
+            if j == nxt:
+                return d
+        return None
+
+    # -------- 决策 --------
+    def decide(self):
+        t0 = time.perf_counter()
+        g = self.game
+        self._sync_body()
+        self._food_field()
+        head = self.index(g.snake[0])
+        move = None
+        if head is not None:
+            if g.effective_wrap():
+                nbrs, adj = self.nbrs_wrap, self.adj_wrap
+            else:
+                nbrs, adj = self.nbrs, self.adj
+            # 蛇在动时不能直接掉头（set_dir 会忽略）；一节长的蛇刚离开的格子看起来是空的，得专门排除
+            self.back = DIRS.index(g.dir) ^ 1 if g.dir != (0, 0) else None
+            self.behind = self._step(head, self.back, nbrs)
+            if self.order is not None and not g.obstacles:
+                move = self._cycle_move(head, nbrs, adj)
+            else:
+                move = self._path_move(head, nbrs, adj)
+            if move is None:
+                path = self._chase(head, nbrs, adj)
+                move = path and self._dir_to(head, path[0], nbrs)
+        if move is not None:
+            g.set_dir(*DIRS[move])
+        self.decide_time = time.perf_counter() - t0
+        return move
+
+
+# =========================
+# 无头浸泡测试
+# =========================
+def soak(games=10, settings=None, max_ticks=20000):
+    settings = settings or Settings()
+    worst = 0.0
+    for k in range(games):
+        g = SnakeGame(settings, seed=k)
+        g.pilot = Autopilot(g)
+        g.start()
+        total = 0.0
+        while not g.game_over and g.ticks < max_ticks:
+            g.step()
+            total += g.pilot.decide_time
+            worst = max(worst, g.pilot.decide_time)
+        avg = total / max(1, g.ticks) * 1e3
+        end = "died" if g.game_over else "alive"
+        print(f"game {k:>3}: score {g.score:>5}  length {len(g.snake):>4}  ticks {g.ticks:>6}  "
+              f"{end}  decide avg {avg:.3f} ms")
+    print(f"worst decide: {worst * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    soak(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
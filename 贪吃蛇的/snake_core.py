@@ -0,0 +1,443 @@
+import heapq
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import NamedTuple
+
+# =========================
+# 基础配置（不依赖 pygame）
+# =========================
+W, H = 1000, 720
+GRID = 20
+
+DIFFICULTY = {
+    "Easy": 9,     # 每秒移动次数（tick）
+    "Normal": 12,
+    "Hard": 16,
+    "Insane": 20,
+}
+
+LEVEL_STEP = 60
+MAX_LEVEL = 10
+POWERUP_T = 6.0
+
+# 一帧内最多补跑几步（卡顿后不再一口气连走很多步）
+MAX_CATCHUP = 3
+
+
+class Bounds(NamedTuple):
+    """棋盘边界（像素坐标）。本身是 4 元组，可直接当 pygame 的 rect 参数用。"""
+    x: int
+    y: int
+    w: int
+    h: int
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @property
+    def cols(self):
+        return self.w // GRID
+
+    @property
+    def rows(self):
+        return self.h // GRID
+
+    def cells(self):
+        # 网格以 (x, y) 为原点对齐；不足一格的边角不算
+        return [(self.x + c * GRID, self.y + r * GRID)
+                for r in range(self.rows) for c in range(self.cols)]
+
+
+PLAY = Bounds(280, 90, W - 320, H - 130)
+
+# 大地图：200x200 格，比窗口大得多，pygame 前端用跟随蛇头的摄像机只画视口里的部分
+BIG_COLS, BIG_ROWS = 200, 200
+BIG_PLAY = Bounds(0, 0, BIG_COLS * GRID, BIG_ROWS * GRID)
+
+
+class FreeCells:
+    """空格子索引：列表 + 下标表，增删 O(1)（删除时与末尾交换），可 O(1) 均匀抽样。"""
+
+    _boards = {}
+
+    def __init__(self, cells=()):
+        self.cells = list(cells)
+        self.index = {c: i for i, c in enumerate(self.cells)}
+
+    @classmethod
+    def for_board(cls, play):
+        # 同一块棋盘的初始索引只建一次，之后每局复制
+        board = cls._boards.get(play)
+        if board is None:
+            board = cls._boards[play] = cls(play.cells())
+        return board.copy()
+
+    def copy(self):
+        other = FreeCells.__new__(FreeCells)
+        other.cells = self.cells.copy()
+        other.index = self.index.copy()
+        return other
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.index
+
+    def add(self, cell):
+        if cell not in self.index:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        i = self.index.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.index[last] = i
+
+    def sample(self, rng=random):
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+
+class FixedStep:
+    """
+    固定步长调度：累积帧时间，按当前 tick 周期执行逻辑步。
+    每帧最多执行 max_steps 步，超出的整拍时间丢弃并计入 dropped；
+    alpha 为剩余时间占一拍的比例，渲染时用来插值。
+    """
+
+    def __init__(self, max_steps=MAX_CATCHUP):
+        self.max_steps = max_steps
+        self.accum = 0.0
+        self.alpha = 0.0
+        self.steps = 0           # 上一帧执行的步数
+        self.dropped = 0.0       # 上一帧丢弃的时间（秒）
+        self.dropped_total = 0.0
+
+    def run(self, dt, rate, step):
+        # rate() 返回当前每秒步数；每步之后重新取，吃到食物提速立即生效
+        self.accum += dt
+        self.steps = 0
+        self.dropped = 0.0
+        period = 1.0 / rate()
+        while self.accum >= period:
+            if self.steps == self.max_steps:
+                drop = self.accum - self.accum % period
+                self.accum -= drop
+                self.dropped = drop
+                self.dropped_total += drop
+                break
+            self.accum -= period
+            step()
+            self.steps += 1
+            period = 1.0 / rate()
+        self.alpha = min(1.0, self.accum / period)
+        return self.steps
+
+
+# =========================
+# 游戏状态结构
+# =========================
+@dataclass
+class Settings:
+    difficulty: str = "Normal"
+    wrap: bool = False
+    obstacles: bool = True
+    sound: bool = True
+    level_mode: bool = True
+
+
+class Buffs:
+    """
+    buff 时间线：到期事件放在最小堆里，只在 buff 开始/结束时翻转 inv/slow/wrap/double 标志，
+    每帧查询只是读属性。时间是对局时钟（SnakeGame.t），暂停时不会流逝。
+    """
+
+    NAMES = ("inv", "slow", "wrap", "double")
+
+    def __init__(self):
+        self.inv = False
+        self.slow = False
+        self.wrap = False
+        self.double = False
+        self.until = {}
+        self.events = []
+
+    def start(self, name, until):
+        self.until[name] = until
+        setattr(self, name, True)
+        heapq.heappush(self.events, (until, name))
+
+    def advance(self, t):
+        events = self.events
+        while events and events[0][0] <= t:
+            until, name = heapq.heappop(events)
+            # 续期过的 buff 会留下旧事件，跳过
+            if self.until.get(name) == until:
+                del self.until[name]
+                setattr(self, name, False)
+
+
+# =========================
+# 游戏核心
+# =========================
+class SnakeGame:
+    def __init__(self, settings: Settings, best=0, play=PLAY, seed=None):
+        self.settings = settings
+        self.best = best
+        self.bounds = play
+        # 每局一个独立的随机数发生器；不给 seed 的 reset 从这里取新种子
+        self.seeds = random.Random(seed)
+        # 自动驾驶：每步之前调用 pilot.decide()（见 snake_autopilot.Autopilot）
+        self.pilot = None
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = self.seeds.getrandbits(32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        # 对局时钟：每走一步推进 1 / 当前 tick 速率 秒，暂停时自然停住
+        self.t = 0.0
+        self.ticks = 0
+        # 回放用：(第几步, dx, dy)
+        self.inputs = []
+
+        self.score = 0
+        self.level = 1
+        self.tick_rate = float(DIFFICULTY[self.settings.difficulty])
+        self.timer = FixedStep()
+        self.running = False
+        self.paused = False
+        self.game_over = False
+
+        self.buffs = Buffs()
+
+        self.play = self.bounds
+        # 最右列 / 最下行的格子坐标（穿墙与越界判断用）
+        self.last_x = self.play.x + (self.play.cols - 1) * GRID
+        self.last_y = self.play.y + (self.play.rows - 1) * GRID
+        # 既不是蛇身也不是障碍的格子
+        self.free = FreeCells.for_board(self.play)
+
+        cx = self.play.x + (self.play.w // 2 // GRID) * GRID
+        cy = self.play.y + (self.play.h // 2 // GRID) * GRID
+        self.dir = (0, 0)
+        # 上一步之前的蛇头、上一步移走的蛇尾（渲染插值用；没缩尾时为 None）
+        self.prev_head = (cx, cy)
+        self.prev_tail = None
+        # 蛇身：deque 头在左；occupied 记录每格被蛇身占用的次数（无敌时可能重叠）
+        self.snake = deque()
+        self.occupied = {}
+        self.push_head((cx, cy))
+        self.grow = 0
+
+        self.obstacles = set()
+        self.powerup = None  # (kind, (x,y))
+        self.food = self.rand_cell()
+        if self.settings.obstacles:
+            self.rebuild_obstacles()
+
+    def on_board(self, cell):
+        x, y = cell
+        return self.play.x <= x <= self.last_x and self.play.y <= y <= self.last_y
+
+    def push_head(self, cell):
+        self.snake.appendleft(cell)
+        n = self.occupied.get(cell, 0)
+        self.occupied[cell] = n + 1
+        if not n:
+            self.free.discard(cell)
+
+    def pop_tail(self):
+        cell = self.snake.pop()
+        n = self.occupied[cell] - 1
+        if n:
+            self.occupied[cell] = n
+        else:
+            del self.occupied[cell]
+            if cell not in self.obstacles and self.on_board(cell):
+                self.free.add(cell)
+        return cell
+
+    def add_obstacle(self, cell):
+        self.obstacles.add(cell)
+        self.free.discard(cell)
+
+    def clear_obstacles(self):
+        for cell in self.obstacles:
+            if cell not in self.occupied:
+                self.free.add(cell)
+        self.obstacles.clear()
+
+    def effective_wrap(self):
+        return self.settings.wrap or self.buffs.wrap
+
+    def effective_tick(self):
+        base = self.tick_rate
+        if self.buffs.slow:
+            base = max(6.0, base - 5.0)
+        return base
+
+    def hide_cells(self, cells):
+        # 暂时从空格索引里拿掉，返回真正拿掉的那些，之后交给 restore_cells
+        free = self.free
+        taken = [c for c in cells if c in free]
+        for c in taken:
+            free.discard(c)
+        return taken
+
+    def restore_cells(self, taken):
+        for c in taken:
+            self.free.add(c)
+
+    def rand_cell(self, exclude=()):
+        # 从空格子里均匀抽样；exclude 是额外要避开的格子（食物、道具等），没有空位返回 None
+        taken = self.hide_cells(exclude)
+        cell = self.free.sample(self.rng)
+        self.restore_cells(taken)
+        return cell
+
+    def item_cells(self):
+        cells = [self.food] if self.food else []
+        if self.powerup:
+            cells.append(self.powerup[1])
+        return cells
+
+    def rebuild_obstacles(self):
+        self.clear_obstacles()
+        count = 12 + (self.level - 1) * 3
+        # 蛇头周围 5x5 不放障碍
+        hx, hy = self.snake[0]
+        near = [(hx + i * GRID, hy + j * GRID) for i in range(-2, 3) for j in range(-2, 3)]
+        taken = self.hide_cells(self.item_cells() + near)
+        for _ in range(count):
+            c = self.free.sample(self.rng)
+            if c is None:
+                break
+            self.add_obstacle(c)
+        self.restore_cells(taken)
+
+    def set_dir(self, dx, dy):
+        if not self.running or self.paused or self.game_over:
+            return
+        if (dx, dy) == self.dir:
+            return
+        if self.dir != (0, 0) and (dx, dy) == (-self.dir[0], -self.dir[1]):
+            return
+        self.dir = (dx, dy)
+        self.inputs.append((self.ticks, dx, dy))
+
+    def start(self):
+        self.running = True
+        self.paused = False
+        self.game_over = False
+
+    def toggle_pause(self):
+        if not self.running or self.game_over:
+            return
+        self.paused = not self.paused
+
+    def spawn_powerup(self):
+        if self.powerup is not None:
+            return
+        p = min(0.20, 0.08 + (self.level - 1) * 0.01)
+        if self.rng.random() > p:
+            return
+        kind = self.rng.choice(["inv", "slow", "wrap", "double", "bonus"])
+        pos = self.rand_cell(self.item_cells())
+        if pos is None:
+            return
+        self.powerup = (kind, pos)
+
+    def apply_powerup(self, kind):
+        if kind == "bonus":
+            self.score += 30 * (2 if self.buffs.double else 1)
+        else:
+            self.buffs.start(kind, self.t + POWERUP_T)
+        self.powerup = None
+
+    def step(self):
+        if not self.running or self.paused or self.game_over:
+            return
+        if self.pilot is not None:
+            self.pilot.decide()
+        dx, dy = self.dir
+        if (dx, dy) == (0, 0):
+            return
+
+        self.ticks += 1
+        b = self.buffs
+        wrap = self.settings.wrap or b.wrap
+        inv = b.inv
+        play = self.play
+
+        hx, hy = self.snake[0]
+        nx, ny = hx + dx * GRID, hy + dy * GRID
+
+        if wrap:
+            if nx < play.x: nx = self.last_x
+            if nx > self.last_x: nx = play.x
+            if ny < play.y: ny = self.last_y
+            if ny > self.last_y: ny = play.y
+        elif not (play.x <= nx <= self.last_x and play.y <= ny <= self.last_y):
+            if not inv:
+                self.game_over = True
+                return
+
+        new_head = (nx, ny)
+        self.prev_head = (hx, hy)
+        self.prev_tail = None
+
+        if not inv:
+            if new_head in self.obstacles:
+                self.game_over = True
+                return
+            if new_head in self.occupied:
+                self.game_over = True
+                return
+
+        self.push_head(new_head)
+
+        if new_head == self.food:
+            mult = 2 if b.double else 1
+            self.score += 10 * mult
+            self.grow += 1
+
+            self.tick_rate = min(26.0, self.tick_rate + 0.35)
+
+            if self.settings.level_mode:
+                new_level = min(MAX_LEVEL, 1 + self.score // LEVEL_STEP)
+                if new_level != self.level:
+                    self.level = new_level
+                    if self.settings.obstacles:
+                        self.rebuild_obstacles()
+
+            # 棋盘已满时 food 为 None
+            self.food = self.rand_cell([self.powerup[1]] if self.powerup else ())
+        else:
+            if self.powerup and new_head == self.powerup[1]:
+                self.apply_powerup(self.powerup[0])
+
+            if self.grow > 0:
+                self.grow -= 1
+            else:
+                self.prev_tail = self.pop_tail()
+
+        self.spawn_powerup()
+        self.t += 1.0 / self.effective_tick()
+        self.buffs.advance(self.t)
+
+    def update(self, dt):
+        if not self.running or self.paused or self.game_over:
+            return
+        self.timer.run(dt, self.effective_tick, self.step)
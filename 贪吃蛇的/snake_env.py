@@ -0,0 +1,161 @@
+import numpy as np
+
+from snake_core import GRID, PLAY, Bounds, Buffs, Settings, SnakeGame
+
+# 动作编号：上 下 左 右（与 snake_vec.DIRS 同序）；-1 表示保持当前方向
+ACTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+KEEP = -1
+
+# 网格观测的通道
+BODY, HEAD, FOOD, OBSTACLE, POWERUP = range(5)
+N_CHANNELS = 5
+
+N_FEATURES = 16
+
+
+# =========================
+# 环境包装：reset() / step(action)
+# =========================
+class SnakeEnv:
+    """
+    单局 SnakeGame 的强化学习接口。
+    obs="grid"：形状 (5, rows, cols) 的 uint8 通道图（蛇身/蛇头/食物/障碍/道具）；
+    obs="features"：长度 16 的 float32 特征向量。
+    观测缓冲区只分配一次，每次 reset/step 原地更新并返回同一个数组，需要保存时请自行 copy。
+    reset(seed) 可固定该局的随机种子。
+    step(action) 的动作编号和 VecSnake.step 一致：0 上 1 下 2 左 3 右，-1 不变；其他值抛 ValueError。
+    """
+
+    def __init__(self, settings: Settings = None, cols=None, rows=None, obs="grid", seed=None):
+        self.settings = settings or Settings()
+        if cols is None and rows is None:
+            self.play = PLAY
+        else:
+            self.play = Bounds(0, 0, (cols or PLAY.cols) * GRID, (rows or PLAY.rows) * GRID)
+        self.cols, self.rows = self.play.cols, self.play.rows
+        self.obs_mode = obs
+        if obs == "grid":
+            self.obs = np.zeros((N_CHANNELS, self.rows, self.cols), np.uint8)
+        elif obs == "features":
+            self.obs = np.zeros(N_FEATURES, np.float32)
+        else:
+            raise ValueError(f"unknown obs mode: {obs!r}")
+        self.game = SnakeGame(self.settings, play=self.play, seed=seed)
+
+    # -------- 坐标 --------
+    def _rc(self, cell):
+        # 像素坐标 -> (行, 列)；棋盘外返回 None
+        c = (cell[0] - self.play.x) // GRID
+        r = (cell[1] - self.play.y) // GRID
+        if 0 <= c < self.cols and 0 <= r < self.rows:
+            return r, c
+        return None
+
+    def _put(self, ch, cell, v):
+        rc = self._rc(cell) if cell else None
+        if rc:
+            self.obs[ch, rc[0], rc[1]] = v
+
+    # -------- 接口 --------
+    def reset(self, seed=None):
+        self.game.reset(seed)
+        self.game.start()
+        if self.obs_mode == "grid":
+            self._fill_grid()
+        else:
+            self._fill_features()
+        return self.obs
+
+    def step(self, action):
+        g = self.game
+        if g.game_over:
+            raise RuntimeError("episode is over, call reset()")
+        if action != KEEP:
+            # 不能直接拿来下标：-1 会按 Python 负下标变成“右”
+            if not 0 <= action < len(ACTIONS):
+                raise ValueError(f"action must be 0..{len(ACTIONS) - 1} or {KEEP}, got {action!r}")
+            g.set_dir(*ACTIONS[action])
+
+        old_head = g.snake[0]
+        old_tail = g.snake[-1]
+        old_len = len(g.snake)
+        old_food = g.food
+        old_pu = g.powerup
+        old_level = g.level
+        score = g.score
+
+        g.step()
+
+        reward = g.score - score
+        done = g.game_over
+        if self.obs_mode == "grid":
+            if not done:
+                self._update_grid(old_head, old_tail, old_len, old_food, old_pu, old_level)
+        else:
+            self._fill_features()
+        return self.obs, reward, done
+
+    # -------- 网格观测 --------
+    def _fill_grid(self):
+        g = self.game
+        self.obs[:] = 0
+        for cell in g.occupied:
+            self._put(BODY, cell, 1)
+        for cell in g.obstacles:
+            self._put(OBSTACLE, cell, 1)
+        self._put(HEAD, g.snake[0], 1)
+        self._put(FOOD, g.food, 1)
+        if g.powerup:
+            self._put(POWERUP, g.powerup[1], 1)
+
+    def _update_grid(self, old_head, old_tail, old_len, old_food, old_pu, old_level):
+        # 每步只改动几个格子：旧头/新头/旧尾/食物/道具；升级重建障碍时整图重画
+        g = self.game
+        if g.level != old_level:
+            self._fill_grid()
+            return
+        head = g.snake[0]
+        self._put(HEAD, old_head, 0)
+        self._put(HEAD, head, 1)
+        self._put(BODY, head, 1)
+        if len(g.snake) == old_len and old_tail not in g.occupied:
+            self._put(BODY, old_tail, 0)
+        if g.food != old_food:
+            self._put(FOOD, old_food, 0)
+            self._put(FOOD, g.food, 1)
+        if g.powerup != old_pu:
+            if old_pu:
+                self._put(POWERUP, old_pu[1], 0)
+            if g.powerup:
+                self._put(POWERUP, g.powerup[1], 1)
+
+    # -------- 特征观测 --------
+    def _blocked(self, x, y):
+        g = self.game
+        if g.effective_wrap():
+            if x < g.play.x: x = g.last_x
+            if x > g.last_x: x = g.play.x
+            if y < g.play.y: y = g.last_y
+            if y > g.last_y: y = g.play.y
+        elif not g.on_board((x, y)):
+            return True
+        return (x, y) in g.occupied or (x, y) in g.obstacles
+
+    def _fill_features(self):
+        # 0-2 前/左/右是否危险，3-6 当前方向，7-10 食物在上/下/左/右，11-14 buff，15 长度占比
+        g = self.game
+        f = self.obs
+        f[:] = 0.0
+        hx, hy = g.snake[0]
+        dx, dy = g.dir if g.dir != (0, 0) else (0, -1)
+        if not g.buffs.inv:
+            for i, (ax, ay) in enumerate(((dx, dy), (dy, -dx), (-dy, dx))):
+                f[i] = self._blocked(hx + ax * GRID, hy + ay * GRID)
+        if g.dir != (0, 0):
+            f[3 + ACTIONS.index(g.dir)] = 1.0
+        if g.food:
+            fx, fy = g.food
+            f[7], f[8], f[9], f[10] = fy < hy, fy > hy, fx < hx, fx > hx
+        for i, name in enumerate(Buffs.NAMES):
+            f[11 + i] = getattr(g.buffs, name)
+        f[15] = len(g.snake) / (self.cols * self.rows)
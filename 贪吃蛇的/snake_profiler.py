@@ -0,0 +1,92 @@
+import csv
+import time
+from collections import deque
+
+# =========================
+# 帧耗时采样
+# =========================
+# 每帧一条样本：各阶段毫秒数 + 本帧逻辑步数 + 本帧因为落后太多丢掉的游戏时间；update 的时间包含 step
+PHASES = ("events", "update", "step", "render")
+COLUMNS = ("frame", "time", "total_ms") + tuple(f"{p}_ms" for p in PHASES) + ("steps", "dropped_ms")
+
+
+def percentile(sorted_values, q):
+    # 最近邻取值，样本只有几百个，够用
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class FrameProfiler:
+    """
+    记录最近 window 帧的各阶段耗时，给叠加层算 p50/p95/p99 和画曲线；
+    csv_path 非空时每帧原样追加一行，供离线分析。
+    计时靠 timed() 包装被测函数，关掉时把包装拿掉即可，被测代码本身不做任何判断。
+    """
+
+    def __init__(self, window=240, csv_path=None):
+        self.frames = deque(maxlen=window)   # (total, events, update, step, render, steps, dropped)
+        self.count = 0
+        self.cur = dict.fromkeys(PHASES, 0.0)
+        self.start = None
+        self.t0 = time.perf_counter()
+        self.csv_file = None
+        self.csv = None
+        if csv_path:
+            self.csv_file = open(csv_path, "w", newline="", encoding="utf-8")
+            self.csv = csv.writer(self.csv_file)
+            self.csv.writerow(COLUMNS)
+
+    def timed(self, phase, fn):
+        cur = self.cur
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            t = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                cur[phase] += (clock() - t) * 1000.0
+        return wrapper
+
+    # -------- 帧边界 --------
+    def begin(self):
+        for p in PHASES:
+            self.cur[p] = 0.0
+        self.start = time.perf_counter()
+
+    def end(self, steps, dropped=0.0):
+        if self.start is None:
+            return
+        now = time.perf_counter()
+        total = (now - self.start) * 1000.0
+        self.start = None
+        c = self.cur
+        sample = (total, c["events"], c["update"], c["step"], c["render"], steps, dropped)
+        self.frames.append(sample)
+        self.count += 1
+        if self.csv:
+            self.csv.writerow((self.count, f"{now - self.t0:.6f}") + tuple(f"{v:.4f}" for v in sample[:5])
+                              + (steps, f"{dropped:.4f}"))
+
+    # -------- 统计 --------
+    def stats(self):
+        # {"total"/阶段名: (p50, p95, p99)}，外加最近窗口里每帧的步数均值/最大值、丢掉的时间（毫秒）合计/有丢的帧数
+        out = {}
+        for i, name in enumerate(("total",) + PHASES):
+            values = sorted(f[i] for f in self.frames)
+            out[name] = tuple(percentile(values, q) for q in (50, 95, 99))
+        steps = [f[5] for f in self.frames]
+        out["steps"] = (sum(steps) / len(steps) if steps else 0.0, max(steps, default=0))
+        dropped = [f[6] for f in self.frames if f[6]]
+        out["dropped"] = (sum(dropped), len(dropped))
+        return out
+
+    def totals(self):
+        return [f[0] for f in self.frames]
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = self.csv = None
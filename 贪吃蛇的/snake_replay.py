@@ -0,0 +1,118 @@
+import struct
+from dataclasses import dataclass, field
+
+from snake_core import DIFFICULTY, Bounds, Settings, SnakeGame
+
+# =========================
+# 回放文件格式
+# =========================
+# 头部（小端）：魔数 "SNKR"、版本、开关位、难度序号、棋盘 x/y/w/h、种子、总步数、分数、输入条数
+# 之后每条输入一个 varint：(与上一条的步数差 << 2) | 方向编号
+MAGIC = b"SNKR"
+# 同一个种子摆出来的局面一变（比如障碍的抽样方式改了），旧回放就重演不出原来那局，得升版本号
+VERSION = 2
+HEADER = struct.Struct("<4sBBBHHHHIIII")
+
+# 方向编号：上 下 左 右（与 snake_env.ACTIONS 同序）
+DIRS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+DIR_CODE = {d: i for i, d in enumerate(DIRS)}
+DIFF_NAMES = list(DIFFICULTY.keys())
+
+F_WRAP, F_OBSTACLES, F_LEVEL_MODE = 1, 2, 4
+
+
+@dataclass
+class Replay:
+    seed: int
+    settings: Settings
+    play: Bounds
+    ticks: int = 0
+    score: int = 0
+    inputs: list = field(default_factory=list)  # [(tick, dx, dy)]
+
+
+def from_game(game: SnakeGame) -> Replay:
+    return Replay(game.seed, game.settings, game.play, game.ticks, game.score, list(game.inputs))
+
+
+# =========================
+# 编解码
+# =========================
+def _put_varint(out, v):
+    while v >= 0x80:
+        out.append((v & 0x7F) | 0x80)
+        v >>= 7
+    out.append(v)
+
+
+def encode(rep: Replay) -> bytes:
+    s = rep.settings
+    flags = (F_WRAP if s.wrap else 0) | (F_OBSTACLES if s.obstacles else 0) | (F_LEVEL_MODE if s.level_mode else 0)
+    out = bytearray(HEADER.pack(
+        MAGIC, VERSION, flags, DIFF_NAMES.index(s.difficulty),
+        *rep.play, rep.seed, rep.ticks, rep.score, len(rep.inputs),
+    ))
+    last = 0
+    for tick, dx, dy in rep.inputs:
+        _put_varint(out, ((tick - last) << 2) | DIR_CODE[(dx, dy)])
+        last = tick
+    return bytes(out)
+
+
+def decode(data: bytes) -> Replay:
+    (magic, version, flags, diff, x, y, w, h,
+     seed, ticks, score, count) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a snake replay")
+    if version != VERSION:
+        raise ValueError(f"unsupported replay version {version} (this build plays version {VERSION})")
+    settings = Settings(
+        difficulty=DIFF_NAMES[diff],
+        wrap=bool(flags & F_WRAP),
+        obstacles=bool(flags & F_OBSTACLES),
+        level_mode=bool(flags & F_LEVEL_MODE),
+    )
+    inputs = []
+    pos, tick = HEADER.size, 0
+    for _ in range(count):
+        v, shift = 0, 0
+        while True:
+            b = data[pos]
+            pos += 1
+            v |= (b & 0x7F) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        tick += v >> 2
+        inputs.append((tick, *DIRS[v & 3]))
+    return Replay(seed, settings, Bounds(x, y, w, h), ticks, score, inputs)
+
+
+def save(path, rep: Replay):
+    with open(path, "wb") as f:
+        f.write(encode(rep))
+
+
+def load(path) -> Replay:
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+# =========================
+# 无头重演
+# =========================
+def simulate(rep: Replay) -> SnakeGame:
+    """按种子与输入重新跑一遍，返回结束时的 SnakeGame。"""
+    g = SnakeGame(rep.settings, play=rep.play, seed=rep.seed)
+    g.start()
+    inputs = rep.inputs
+    i, n = 0, len(inputs)
+    while g.ticks < rep.ticks and not g.game_over:
+        while i < n and inputs[i][0] <= g.ticks:
+            g.set_dir(inputs[i][1], inputs[i][2])
+            i += 1
+        before = g.ticks
+        g.step()
+        if g.ticks == before:
+            break
+    return g
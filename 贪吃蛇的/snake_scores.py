@@ -0,0 +1,104 @@
+import json
+import os
+from datetime import datetime
+
+# =========================
+# 存档：Top10 + 最高分 + 设置（贪吃蛇3.py / 贪吃蛇4.py 共用）
+# =========================
+SAVE_FILE = "snake_scores.json"
+TOP_N = 10
+
+
+def empty_save():
+    return {"best": 0, "top": [], "settings": {}}
+
+
+class ScoreStore:
+    """
+    存档的内存副本：第一次用到时读一次盘，之后读取都走内存；
+    每次改动立即写回磁盘，并通知订阅者（只在内容真的变了时）。
+    """
+
+    def __init__(self, path=SAVE_FILE):
+        self.path = path
+        self.data = None
+        self.version = 0   # 每次改动 +1，界面可以拿它判断要不要重画
+        self.listeners = []
+
+    def load(self):
+        if self.data is None:
+            self.data = empty_save()
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self.data.update(json.load(f))
+                except Exception:
+                    pass
+        return self.data
+
+    def save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.load(), f, ensure_ascii=False, indent=2)
+        except Exception:
+            pass
+
+    def subscribe(self, fn):
+        # fn(store) 在每次改动写盘之后调用
+        self.listeners.append(fn)
+
+    def _changed(self):
+        self.version += 1
+        self.save()
+        for fn in self.listeners:
+            fn(self)
+
+    # -------- 读取 --------
+    @property
+    def top(self):
+        return self.load()["top"]
+
+    @property
+    def best(self):
+        return int(self.load().get("best", 0))
+
+    @property
+    def settings(self):
+        return self.load()["settings"]
+
+    # -------- 修改 --------
+    def add_score(self, score, replay=None):
+        # 返回这条记录有没有进 Top 列表；replay() 只在进了列表时才调用，
+        # 返回回放文件名（snake_verify.py 用它核对这条记录），没进榜的局不留回放
+        d = self.load()
+        entry = {"score": int(score), "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        top = sorted(d["top"] + [entry], key=lambda x: x["score"], reverse=True)[:TOP_N]
+        made = any(e is entry for e in top)
+        if made and replay:
+            name = replay()
+            if name:
+                entry["replay"] = name
+        best = max(self.best, int(score))
+        if top == d["top"] and best == self.best:
+            return made
+        d["top"] = top
+        d["best"] = best
+        self._changed()
+        return made
+
+    def clear_top(self):
+        if self.top:
+            self.load()["top"] = []
+            self._changed()
+
+    def set_settings(self, settings, best=0):
+        d = self.load()
+        best = max(self.best, int(best))
+        if d["settings"] == settings and best == self.best:
+            return
+        d["settings"] = dict(settings)
+        d["best"] = best
+        self._changed()
+
+
+STORE = ScoreStore()
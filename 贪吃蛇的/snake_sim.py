@@ -0,0 +1,242 @@
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import cached_property
+from typing import NamedTuple
+
+from snake_core import MAX_CATCHUP, Bounds, SnakeGame
+
+
+# =========================
+# 快照：渲染线程只读的对局状态
+# =========================
+class BuffFlags(NamedTuple):
+    inv: bool
+    slow: bool
+    wrap: bool
+    double: bool
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    某一时刻的对局状态，字段名与 SnakeGame 一致，绘制代码可以直接拿它当 game 用。
+    发布之后不再改动；obstacles 在障碍没变时沿用同一个 frozenset。
+    """
+    seed: int
+    ticks: int
+    play: Bounds
+    snake: tuple
+    prev_head: tuple
+    prev_tail: tuple
+    food: tuple
+    powerup: tuple
+    obstacles: frozenset
+    score: int
+    level: int
+    buffs: BuffFlags
+    running: bool
+    paused: bool
+    game_over: bool
+    stamp: float    # 最近一步的时间（perf_counter）
+    period: float   # 当前一步的时长（秒）
+    still: float    # 不在跑时定格的插值比例；在跑时为 -1
+
+    @cached_property
+    def occupied(self):
+        # 每格被蛇身占用的次数，只有大地图按格子查时才用到，用到时才算
+        counts = {}
+        for cell in self.snake:
+            counts[cell] = counts.get(cell, 0) + 1
+        return counts
+
+    def alpha(self, now):
+        # 距最近一步过去了几分之一拍，渲染插值用
+        if self.still >= 0:
+            return self.still
+        return min(1.0, (now - self.stamp) / self.period)
+
+
+def active(g):
+    return g.running and not g.paused and not g.game_over
+
+
+# =========================
+# 模拟线程
+# =========================
+class SimThread:
+    """
+    在自己的线程里按 effective_tick 的节拍推进 SnakeGame，每一步（以及每条命令）之后发布新快照。
+    渲染线程每帧读一次 front，不加锁：快照发布后只读，换快照只是一次引用赋值，
+    所以正在画的那一份（前台）不会被写到，新的一份（后台）建好才换上来。
+    改对局状态的操作（转向、暂停、接管……）用 call() 交给模拟线程在两步之间执行，回放记录的步数不会错位。
+    jitter 记录每一步实际开始比计划晚了多少秒。
+    命令抛出的异常交回给 call() 的调用方；step()（包括自动驾驶的 decide()）抛出异常时模拟线程退出，
+    异常记在 error 里，之后的 call() / check() / stop() 在调用方的线程里把它抛出来。
+
+    只靠操作系统调度，渲染线程正好在画的时候（尤其是单核机器、或者渲染在跑纯 Python 代码占着 GIL），
+    到点的那一步要等好几毫秒才轮得到；所以渲染线程每帧开始前调用 yield_to_tick()，把到点的那一步让过去。
+    """
+
+    SPIN = 0.003  # 最后这么一小段不睡而是自旋：空闲的机器从睡眠里醒来可能要晚一两毫秒
+
+    def __init__(self, game: SnakeGame, window=1000):
+        self.game = game
+        self.commands = queue.SimpleQueue()
+        self.jitter = deque(maxlen=window)
+        self.due = None           # 下一步的计划时间（perf_counter）；不在跑时为 None
+        self.steps = 0
+        self.stepped = threading.Event()  # 每走一步 set 一次，yield_to_tick 用它等
+        self.dropped = 0          # 落后太多被丢掉的步数
+        self.error = None         # 让模拟线程退出的异常
+        self._obstacles_key = None
+        self._obstacles = frozenset()
+        self.stamp = time.perf_counter()
+        if active(game):
+            self.due = self.stamp + 1.0 / game.effective_tick()
+        self.front = None
+        self.publish()
+        self.thread = threading.Thread(target=self._run, name="snake-sim", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.commands.put(None)
+        self.thread.join()
+        self.check()
+
+    def check(self):
+        # 模拟线程是因为异常退出的，就在调用方的线程里抛出来
+        if self.error is not None:
+            raise RuntimeError("simulation thread died") from self.error
+
+    def call(self, fn, *args):
+        # 交给模拟线程在两步之间执行，等它执行完、新快照发布了再返回；命令都很短。
+        # fn 抛出的异常在这里重新抛出；线程已经不在了就直接报错，不会一直等下去
+        self.check()
+        if not self.thread.is_alive():
+            raise RuntimeError("simulation thread is not running")
+        done = threading.Event()
+        failed = []
+        self.commands.put((fn, args, done, failed))
+        # 分小段等：等的时候线程出错退出了，这条命令就再也没人执行
+        while not done.wait(0.05):
+            if not self.thread.is_alive():
+                self.check()
+                raise RuntimeError("simulation thread is not running")
+        if failed:
+            raise failed[0]
+
+    def yield_to_tick(self, budget):
+        # 渲染线程在开始一帧之前调用：budget 秒（这一帧大概要画多久）之内有一步要跑，
+        # 就先睡到这一步跑完再画，让它不必和渲染抢 CPU / GIL
+        due = self.due
+        if due is None:
+            return
+        # 模拟线程提前 SPIN 秒醒来自旋，从那时起就别再占着 GIL
+        wait = due - self.SPIN - time.perf_counter()
+        if wait >= budget:
+            return
+        # 阻塞在 Event 上等这一步跑完，不要轮询：轮询会和模拟线程来回抢 GIL
+        steps = self.steps
+        self.stepped.clear()
+        if self.steps == steps:
+            self.stepped.wait(max(0.0, wait) + self.SPIN + 0.005)
+
+    # -------- 发布 --------
+    def publish(self):
+        g = self.game
+        key = (g.seed, g.level, len(g.obstacles))
+        if key != self._obstacles_key:
+            self._obstacles_key = key
+            self._obstacles = frozenset(g.obstacles)
+        period = 1.0 / g.effective_tick()
+        still = -1.0
+        if not active(g):
+            still = 1.0 if self.front is None else self.front.alpha(time.perf_counter())
+        b = g.buffs
+        self.front = Snapshot(
+            g.seed, g.ticks, g.play, tuple(g.snake), g.prev_head, g.prev_tail, g.food, g.powerup,
+            self._obstacles, g.score, g.level, BuffFlags(b.inv, b.slow, b.wrap, b.double),
+            g.running, g.paused, g.game_over, self.stamp, period, still,
+        )
+
+    # -------- 线程主体 --------
+    def _run(self):
+        try:
+            self._loop()
+        except BaseException as e:
+            # 记下来交给渲染线程抛出；不再有下一步，yield_to_tick 也别再等
+            self.error = e
+            self.due = None
+            self.stepped.set()
+
+    def _loop(self):
+        g = self.game
+        clock = time.perf_counter
+        due = self.due
+        while True:
+            # 有命令就先执行；否则等到离下一步只差 SPIN 秒
+            if due is None:
+                cmd = self.commands.get()
+            else:
+                wait = due - clock() - self.SPIN
+                try:
+                    cmd = self.commands.get(timeout=wait) if wait > 0 else self.commands.get_nowait()
+                except queue.Empty:
+                    cmd = ()
+            if cmd is None:
+                return
+            if cmd:
+                fn, args, done, failed = cmd
+                was = active(g)
+                try:
+                    fn(*args)
+                except Exception as e:
+                    failed.append(e)
+                # 命令失败了对局也可能已经改了一半，照样按新状态排节拍、发布快照；调用方一定等得到
+                try:
+                    if active(g) and not was:
+                        self.stamp = clock()
+                        due = self.stamp + 1.0 / g.effective_tick()
+                    elif not active(g):
+                        due = None
+                    self.due = due
+                    self.publish()
+                finally:
+                    done.set()
+                continue
+            if due is None:
+                continue
+            # 自旋时也放开 GIL：别的线程这时醒来只需要很短一下（通常是进 yield_to_tick 让路）
+            while clock() < due:
+                time.sleep(0)
+            now = clock()
+            self.jitter.append(now - due)
+            g.step()
+            self.steps += 1
+            self.stamp = now
+            period = 1.0 / g.effective_tick()
+            due += period
+            # 卡住太久（比如系统挂起）就不再一口气补跑，和 FixedStep 一样丢掉落下的整拍
+            if now - due > MAX_CATCHUP * period:
+                self.dropped += int((now - due) / period)
+                due = now + period
+            if not active(g):
+                due = None
+            self.publish()
+            self.due = due
+            self.stepped.set()
+
+    # -------- 统计 --------
+    def jitter_stats(self):
+        # (p50, p99, max)，单位毫秒
+        values = sorted(self.jitter)
+        if not values:
+            return 0.0, 0.0, 0.0
+        return (values[len(values) // 2] * 1e3, values[min(len(values) - 1, int(len(values) * 0.99))] * 1e3,
+                values[-1] * 1e3)
@@ -0,0 +1,225 @@
+import math
+import time
+import turtle
+from collections import deque
+from contextlib import contextmanager
+
+# =========================
+# turtle 前端共用（贪吃蛇.py / 贪吃蛇2.py / 贪吃蛇3.py）
+# =========================
+
+
+# =========================
+# 对象池
+# =========================
+class TurtlePool:
+    """
+    蛇身、障碍这类小方块 turtle 的回收站。turtle 没法真正删掉一个 Turtle：
+    它的图形一直留在画布上，Screen.update() 每次也都要把所有建过的 Turtle 过一遍。
+    release() 只是藏起来放回池里，acquire() 先拿藏着的，不够才新建；
+    画布上的图形只跟同一时刻最多用到多少个有关，重开多少局都不会涨。
+    """
+
+    def __init__(self, shape="square"):
+        self.shape = shape
+        self.free = []
+        self.created = 0
+
+    def acquire(self, color, pos=None):
+        if self.free:
+            t = self.free.pop()
+        else:
+            t = turtle.Turtle(visible=False)
+            t.shape(self.shape)
+            t.penup()
+            t.speed(0)
+            t.setundobuffer(None)  # 从来不 undo，别每次 goto 都记一笔
+            self.created += 1
+        t.color(color)
+        if pos is not None:
+            t.goto(pos)
+        t.showturtle()
+        return t
+
+    def release(self, t):
+        t.hideturtle()
+        self.free.append(t)
+
+    def release_all(self, turtles):
+        # 把一组 turtle 都还回来并清空这个列表
+        for t in turtles:
+            self.release(t)
+        turtles.clear()
+
+
+# =========================
+# 格子占用
+# =========================
+class GridIndex:
+    """
+    整数格子占用表，按种类分开记（"body"、"obstacle"、"moving"……），每种是 {格子: 占用次数}。
+    turtle 坐标是浮点，进出都先换算成格子，不会因为累积误差对不上；
+    碰撞判断就是查一次字典，不用再对每一节算 distance() 或者逐个比 xcor()/ycor()。
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.kinds = {}
+
+    def cell(self, x, y):
+        # 四舍五入到最近的格子；不用 round()，它逢 .5 取偶，半格的位置会往两边跑
+        return math.floor(x / self.grid + 0.5), math.floor(y / self.grid + 0.5)
+
+    def add(self, kind, x, y):
+        counts = self.kinds.setdefault(kind, {})
+        c = self.cell(x, y)
+        counts[c] = counts.get(c, 0) + 1
+
+    def remove(self, kind, x, y):
+        counts = self.kinds[kind]
+        c = self.cell(x, y)
+        if counts[c] > 1:
+            counts[c] -= 1
+        else:
+            del counts[c]
+
+    def move(self, kind, old, new):
+        self.remove(kind, *old)
+        self.add(kind, *new)
+
+    def has(self, kind, x, y):
+        return self.cell(x, y) in self.kinds.get(kind, ())
+
+    def clear(self, kind):
+        self.kinds.pop(kind, None)
+
+
+# =========================
+# 蛇身
+# =========================
+class SnakeBody:
+    """
+    蛇身（不含蛇头），最前面一节紧跟蛇头。
+    整条蛇往前走一格，看起来就是尾巴那节挪到了蛇头刚离开的格子：
+    follow() 只搬尾巴那一只 turtle 到最前面，不再让每一节都 goto 到前一节的位置，蛇多长一步都只动一只。
+    grow() 记下要长的节数，下一次 follow() 在蛇头原来的位置放一节新的，尾巴这一步不动。
+    每一节占的格子同时记在 index 的 "body" 里，hits() 查蛇身只要一次字典查找。
+    """
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.segs = deque()
+        self.cells = deque()    # 和 segs 一一对应，index 里记的位置
+        self.pending = deque()  # 还没长出来的节（颜色）
+
+    def __len__(self):
+        return len(self.segs)
+
+    def __iter__(self):
+        return iter(self.segs)
+
+    def grow(self, color):
+        self.pending.append(color)
+
+    def follow(self, x, y):
+        # 蛇头离开 (x, y) 之前调用
+        if self.pending:
+            t = self.pool.acquire(self.pending.popleft(), (x, y))
+        elif self.segs:
+            t = self.segs.pop()
+            self.index.remove("body", *self.cells.pop())
+            t.goto(x, y)
+        else:
+            return
+        self.segs.appendleft(t)
+        self.cells.appendleft((x, y))
+        self.index.add("body", x, y)
+
+    def hits(self, x, y):
+        return self.index.has("body", x, y)
+
+    def clear(self):
+        self.pool.release_all(self.segs)
+        self.cells.clear()
+        self.pending.clear()
+        self.index.clear("body")
+
+
+# =========================
+# 节拍
+# =========================
+class TickLoop:
+    """
+    用 Screen.ontimer 驱动的游戏循环，代替 while True: ...; time.sleep(delay)。
+    下一步总是对准绝对时间 due 来排，画面和逻辑花掉的时间不会累加到节拍上；两步之间 Tk 照常处理按键。
+    晚了一整拍以上不补跑，落下的拍子记在 skipped 里。period() 每步之后取一次，速度可以随时变。
+    注意 wn.update() 会顺带执行到点的 ontimer 回调：在按键回调里一边阻塞一边刷新画面（倒计时之类）要包在 hold() 里。
+    """
+
+    def __init__(self, screen, step, period, window=4096):
+        self.screen = screen
+        self.step = step
+        self.period = period
+        self.due = 0.0
+        self.jitter = deque(maxlen=window)  # 每步实际开始比计划晚多少秒
+        self.ticks = 0
+        self.skipped = 0
+        self.since = 0.0
+        self.held = False
+
+    def start(self):
+        self.resync()
+        self.since = self.due
+        self.screen.ontimer(self._fire, 0)
+
+    def resync(self):
+        # 从现在重新起拍
+        self.due = time.perf_counter()
+
+    @contextmanager
+    def hold(self):
+        # 有意阻塞一会儿（倒计时、死亡动画……）：期间到点的步不跑，结束后从现在重新起拍，不算晚也不补
+        self.held = True
+        try:
+            yield
+        finally:
+            self.held = False
+            self.resync()
+
+    def _fire(self):
+        now = time.perf_counter()
+        period = self.period()
+        if self.held:
+            self.screen.ontimer(self._fire, max(1, math.ceil(period * 1000)))
+            return
+        late = now - self.due
+        if late < -0.001:
+            # hold() 之后重新起拍，之前排好的回调来早了
+            self.screen.ontimer(self._fire, math.ceil(-late * 1000))
+            return
+        if late >= period:
+            missed = int(late / period)
+            self.skipped += missed
+            self.due += missed * period
+            late = now - self.due
+        self.jitter.append(late)
+        self.ticks += 1
+        self.step()
+        self.due += self.period()
+        # ontimer 只有毫秒精度，向上取整：宁可晚一点也不提前
+        self.screen.ontimer(self._fire, max(0, math.ceil((self.due - time.perf_counter()) * 1000)))
+
+    def summary(self):
+        # 上次 summary 以来的实际节拍和迟到统计，然后清零
+        now = time.perf_counter()
+        values = sorted(self.jitter)
+        n = len(values)
+        p50, p99, most = (values[n // 2], values[min(n - 1, int(n * 0.99))], values[-1]) if n else (0.0, 0.0, 0.0)
+        elapsed = max(1e-9, now - self.since)
+        line = (f"tick: {self.ticks} in {elapsed:.1f}s ({self.ticks / elapsed:.2f}/s, target {1.0 / self.period():.2f}/s)  "
+                f"late p50 {p50 * 1e3:.1f} ms  p99 {p99 * 1e3:.1f} ms  max {most * 1e3:.1f} ms  skipped {self.skipped}")
+        self.jitter.clear()
+        self.ticks = self.skipped = 0
+        self.since = now
+        return line
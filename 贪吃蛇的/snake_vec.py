@@ -0,0 +1,245 @@
+import numpy as np
+
+from snake_core import (
+    DIFFICULTY, LEVEL_STEP, MAX_LEVEL, PLAY, POWERUP_T, Settings,
+)
+
+# 动作编号：上 下 左 右；-1 表示保持当前方向
+DIRS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int32)
+
+# 道具种类（与 SnakeGame.spawn_powerup 的顺序一致）
+POWERUP_KINDS = ("inv", "slow", "wrap", "double", "bonus")
+INV, SLOW, WRAP, DOUBLE, BONUS = range(5)
+
+
+# =========================
+# 批量环境：N 局同时推进
+# =========================
+class VecSnake:
+    """
+    N 局游戏放在 NumPy 数组里，每个 tick 一次向量化调用推进全部对局。
+    规则与 SnakeGame.step 相同：食物/成长/穿墙/障碍/道具/升级。
+    坐标用格子单位 (列, 行)；时间按 tick 计（每步推进 1 / 当前 tick 速率 秒）。
+    死亡的对局在 step 内原地重置，结束时的分数记在 final_score。
+    """
+
+    def __init__(self, n, settings: Settings = None, play=PLAY, seed=None):
+        self.n = n
+        self.settings = settings or Settings()
+        self.cols, self.rows = play.cols, play.rows
+        self.ncells = self.cols * self.rows
+        # 无敌时蛇身可重叠，长度可能超过格子数，环形缓冲留足余量
+        self.cap = 2 * self.ncells
+        self.rng = np.random.default_rng(seed)
+
+        cells = np.arange(self.ncells)
+        self.cell_c = cells % self.cols
+        self.cell_r = cells // self.cols
+
+        # 占用网格：body 为蛇身计数，obst 为障碍
+        self.body = np.zeros((n, self.ncells), np.int16)
+        self.obst = np.zeros((n, self.ncells), bool)
+
+        # 环形缓冲蛇身：ptr 指向蛇头，尾部 = ptr - length + 1
+        self.ring_c = np.zeros((n, self.cap), np.int16)
+        self.ring_r = np.zeros((n, self.cap), np.int16)
+        self.ptr = np.zeros(n, np.int64)
+        self.length = np.zeros(n, np.int64)
+        self.hc = np.zeros(n, np.int64)
+        self.hr = np.zeros(n, np.int64)
+        self.dx = np.zeros(n, np.int32)
+        self.dy = np.zeros(n, np.int32)
+        self.grow = np.zeros(n, np.int64)
+
+        self.score = np.zeros(n, np.int64)
+        self.level = np.ones(n, np.int64)
+        self.tick_rate = np.zeros(n, np.float64)
+        self.t = np.zeros(n, np.float64)
+        self.buff_until = np.zeros((n, 4), np.float64)  # inv / slow / wrap / double
+
+        self.food = np.full(n, -1, np.int64)
+        self.pu_kind = np.full(n, -1, np.int64)
+        self.pu_cell = np.full(n, -1, np.int64)
+
+        self.final_score = np.zeros(n, np.int64)
+        self.reset()
+
+    # -------- 重置 --------
+    def reset(self, mask=None):
+        ids = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        if not ids.size:
+            return
+        self.body[ids] = 0
+        self.obst[ids] = False
+        self.score[ids] = 0
+        self.level[ids] = 1
+        self.tick_rate[ids] = float(DIFFICULTY[self.settings.difficulty])
+        self.t[ids] = 0.0
+        self.buff_until[ids] = 0.0
+        self.grow[ids] = 0
+        self.dx[ids] = 0
+        self.dy[ids] = 0
+        self.pu_kind[ids] = -1
+        self.pu_cell[ids] = -1
+
+        cc, cr = self.cols // 2, self.rows // 2
+        self.hc[ids] = cc
+        self.hr[ids] = cr
+        self.ptr[ids] = 0
+        self.length[ids] = 1
+        self.ring_c[ids, 0] = cc
+        self.ring_r[ids, 0] = cr
+        self.body[ids, cr * self.cols + cc] = 1
+
+        self.food[ids] = self._sample_free(ids)
+        if self.settings.obstacles:
+            self._rebuild_obstacles(ids)
+
+    # -------- 抽样 --------
+    def _free_mask(self, ids, *exclude):
+        free = (self.body[ids] == 0) & ~self.obst[ids]
+        k = np.arange(ids.size)
+        for cells in exclude:
+            has = cells >= 0
+            free[k[has], cells[has]] = False
+        return free
+
+    def _sample_free(self, ids, *exclude):
+        # 每局从空格中均匀抽一个；没有空位得到 -1
+        free = self._free_mask(ids, *exclude)
+        keys = self.rng.random(free.shape)
+        keys[~free] = -1.0
+        pick = keys.argmax(axis=1)
+        pick[~free.any(axis=1)] = -1
+        return pick
+
+    def _rebuild_obstacles(self, ids):
+        self.obst[ids] = False
+        counts = 12 + (self.level[ids] - 1) * 3
+        free = self._free_mask(ids, self.food[ids], self.pu_cell[ids])
+        # 蛇头周围 5x5 不放障碍
+        near = ((np.abs(self.cell_c - self.hc[ids, None]) <= 2)
+                & (np.abs(self.cell_r - self.hr[ids, None]) <= 2))
+        free &= ~near
+        keys = self.rng.random(free.shape)
+        keys[~free] = 2.0
+        top = int(counts.max())
+        order = np.argsort(keys, axis=1)[:, :top]
+        take = ((np.take_along_axis(keys, order, axis=1) < 2.0)
+                & (np.arange(top) < counts[:, None]))
+        rows = np.broadcast_to(ids[:, None], order.shape)
+        self.obst[rows[take], order[take]] = True
+
+    # -------- 推进 --------
+    def step(self, actions):
+        """
+        actions: 长度 N 的整数数组（0 上 1 下 2 左 3 右，-1 不变）。
+        返回 (reward, done)：reward 为本步得分增量，done 为本步死亡（已自动重置）。
+        """
+        n, cols, rows = self.n, self.cols, self.rows
+        k = np.arange(n)
+        a = np.asarray(actions, dtype=np.int64)
+
+        # 转向：与 set_dir 一致，静止时任意方向，移动中禁止直接反向
+        turn = a >= 0
+        ndx = DIRS[a.clip(0), 0]
+        ndy = DIRS[a.clip(0), 1]
+        still = (self.dx == 0) & (self.dy == 0)
+        reverse = (ndx == -self.dx) & (ndy == -self.dy) & ~still
+        ok = turn & ~reverse
+        self.dx = np.where(ok, ndx, self.dx)
+        self.dy = np.where(ok, ndy, self.dy)
+
+        reward = np.zeros(n, np.int64)
+        moving = (self.dx != 0) | (self.dy != 0)
+        if not moving.any():
+            return reward, np.zeros(n, bool)
+
+        t = self.t
+        active = t[:, None] < self.buff_until
+        inv = active[:, INV]
+        wrap = self.settings.wrap | active[:, WRAP]
+        double = active[:, DOUBLE]
+
+        nc = self.hc + self.dx
+        nr = self.hr + self.dy
+        nc = np.where(wrap, nc % cols, nc)
+        nr = np.where(wrap, nr % rows, nr)
+        on = (nc >= 0) & (nc < cols) & (nr >= 0) & (nr < rows)
+        idx = np.where(on, nr * cols + nc, 0)
+
+        hit = on & (self.obst[k, idx] | (self.body[k, idx] > 0))
+        dead = moving & ~inv & (~on | hit)
+        live = moving & ~dead
+        lv = np.flatnonzero(live)
+        before = self.score.copy()
+
+        # 新蛇头入环
+        self.ptr[lv] = (self.ptr[lv] + 1) % self.cap
+        self.ring_c[lv, self.ptr[lv]] = nc[lv]
+        self.ring_r[lv, self.ptr[lv]] = nr[lv]
+        self.length[lv] += 1
+        self.hc[lv] = nc[lv]
+        self.hr[lv] = nr[lv]
+        lb = np.flatnonzero(live & on)
+        self.body[lb, idx[lb]] += 1
+
+        # 吃到食物：加分、成长、提速、升级
+        ate = live & on & (idx == self.food)
+        if ate.any():
+            e = np.flatnonzero(ate)
+            self.score[e] += 10 * np.where(double[e], 2, 1)
+            self.grow[e] += 1
+            self.tick_rate[e] = np.minimum(26.0, self.tick_rate[e] + 0.35)
+            if self.settings.level_mode:
+                new_level = np.minimum(MAX_LEVEL, 1 + self.score[e] // LEVEL_STEP)
+                up = e[new_level != self.level[e]]
+                self.level[e] = new_level
+                if self.settings.obstacles and up.size:
+                    self._rebuild_obstacles(up)
+            self.food[e] = self._sample_free(e, self.pu_cell[e])
+
+        # 吃到道具
+        pick = live & ~ate & on & (idx == self.pu_cell)
+        if pick.any():
+            p = np.flatnonzero(pick)
+            kind = self.pu_kind[p]
+            timed = kind != BONUS
+            self.buff_until[p[timed], kind[timed]] = t[p[timed]] + POWERUP_T
+            b = p[~timed]
+            self.score[b] += 30 * np.where(double[b], 2, 1)
+            self.pu_kind[p] = -1
+            self.pu_cell[p] = -1
+
+        # 没吃到食物：有待成长就消耗一次，否则缩尾
+        rest = live & ~ate
+        growing = rest & (self.grow > 0)
+        self.grow[growing] -= 1
+        sh = np.flatnonzero(rest & ~growing)
+        tail = (self.ptr[sh] - self.length[sh] + 1) % self.cap
+        tc = self.ring_c[sh, tail].astype(np.int64)
+        tr = self.ring_r[sh, tail].astype(np.int64)
+        self.length[sh] -= 1
+        ton = (tc >= 0) & (tc < cols) & (tr >= 0) & (tr < rows)
+        self.body[sh[ton], tr[ton] * cols + tc[ton]] -= 1
+
+        # 生成道具
+        chance = np.minimum(0.20, 0.08 + (self.level - 1) * 0.01)
+        spawn = live & (self.pu_kind < 0) & (self.rng.random(n) <= chance)
+        if spawn.any():
+            s = np.flatnonzero(spawn)
+            kinds = self.rng.integers(0, len(POWERUP_KINDS), s.size)
+            cells = self._sample_free(s, self.food[s])
+            got = cells >= 0
+            self.pu_kind[s[got]] = kinds[got]
+            self.pu_cell[s[got]] = cells[got]
+
+        # 按 tick 推进对局时钟（减速 buff 在本步结束时生效）
+        slow = t[lv] < self.buff_until[lv, SLOW]
+        rate = np.where(slow, np.maximum(6.0, self.tick_rate[lv] - 5.0), self.tick_rate[lv])
+        self.t[lv] += 1.0 / rate
+
+        reward[lv] = self.score[lv] - before[lv]
+        self.final_score[dead] = self.score[dead]
+        self.reset(dead)
+        return reward, dead
@@ -0,0 +1,128 @@
+"""
+排行榜提交校验：无头重演回放文件，重新计算最终分数，与文件里声明的分数比对。
+
+    python snake_verify.py replays/            # 校验目录下全部 .snkr
+    python snake_verify.py replays/ -j 8       # 8 个进程
+    python snake_verify.py replays/ --scores snake_scores.json   # 顺带检查 Top10 记录
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import snake_replay
+from snake_core import BIG_PLAY, PLAY
+from snake_scores import ScoreStore
+
+REPLAY_EXT = ".snkr"
+BOARDS = (PLAY, BIG_PLAY)  # 游戏里只有这两种棋盘
+MAX_TICKS = 12 * 3600 * 26  # 按最快 26 步/秒连玩 12 小时算，再多就是伪造的
+
+
+@dataclass
+class Verdict:
+    path: str
+    ok: bool
+    claimed: int = 0
+    actual: int = 0
+    ticks: int = 0
+    game_time: float = 0.0
+    reason: str = ""
+
+
+# =========================
+# 单个回放
+# =========================
+def verify_file(path) -> Verdict:
+    # 文件是别人交上来的，什么都可能是伪造的：先看棋盘和步数在不在正常范围，重演出错也只判这一个不通过
+    try:
+        rep = snake_replay.load(path)
+    except Exception as e:
+        return Verdict(path, False, reason=f"unreadable: {e}")
+    if rep.play not in BOARDS:
+        return Verdict(path, False, rep.score, reason=f"unknown board {tuple(rep.play)}")
+    if rep.ticks > MAX_TICKS:
+        return Verdict(path, False, rep.score, reason=f"{rep.ticks} ticks, more than the {MAX_TICKS} allowed")
+    try:
+        g = snake_replay.simulate(rep)
+    except Exception as e:
+        return Verdict(path, False, rep.score, reason=f"simulation failed: {e!r}")
+    v = Verdict(path, True, rep.score, g.score, g.ticks, g.t)
+    if g.ticks != rep.ticks:
+        v.ok, v.reason = False, f"ended at tick {g.ticks}, replay claims {rep.ticks}"
+    elif g.score != rep.score:
+        v.ok, v.reason = False, f"score {g.score}, replay claims {rep.score}"
+    return v
+
+
+# =========================
+# 目录批量（多进程）
+# =========================
+def replay_files(directory):
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(REPLAY_EXT)
+    )
+
+
+def verify_many(paths, workers=None):
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        return [verify_file(p) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(verify_file, paths, chunksize=chunk))
+
+
+def verify_dir(directory, workers=None):
+    return verify_many(replay_files(directory), workers)
+
+
+def check_leaderboard(save_file, verdicts, replay_dir):
+    # Top10 记录必须引用一个校验通过、分数一致的回放
+    by_name = {os.path.basename(v.path): v for v in verdicts}
+    top = ScoreStore(save_file).top
+    bad = []
+    for item in top:
+        name = item.get("replay")
+        v = by_name.get(name) if name else None
+        if v is None and name and os.path.exists(os.path.join(replay_dir, name)):
+            v = verify_file(os.path.join(replay_dir, name))
+        if v is None or not v.ok or v.actual != int(item.get("score", 0)):
+            bad.append(item)
+    return bad
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Verify snake replays by headless re-simulation.")
+    ap.add_argument("directory")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--scores", help="also check the top list in this save file")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    verdicts = verify_dir(args.directory, args.jobs)
+    wall = time.perf_counter() - t0
+
+    rejected = [v for v in verdicts if not v.ok]
+    for v in rejected:
+        print(f"REJECT {v.path}: {v.reason}")
+    ticks = sum(v.ticks for v in verdicts)
+    game_time = sum(v.game_time for v in verdicts)
+    print(f"{len(verdicts) - len(rejected)} accepted, {len(rejected)} rejected "
+          f"in {wall:.2f}s ({ticks / max(wall, 1e-9):,.0f} ticks/s, "
+          f"{game_time / max(wall, 1e-9):,.0f}x real time)")
+
+    bad = []
+    if args.scores:
+        bad = check_leaderboard(args.scores, verdicts, args.directory)
+        for item in bad:
+            print(f"UNVERIFIED TOP ENTRY {item.get('score')} @ {item.get('time')}")
+    return 1 if rejected or bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,6 +2,8 @@ import turtle
 import time
 import random
 
+from snake_turtle import GridIndex, SnakeBody, TickLoop, TurtlePool
+
 # -----------------------
 # 基本设置
 # -----------------------
@@ -47,7 +49,9 @@ food.color("red")
 food.penup()
 food.goto(0, 100)
 
-segments = []
+# 蛇身方块用完放回池里，下次长身体时再拿出来
+pieces = TurtlePool("square")
+segments = SnakeBody(pieces, GridIndex(20))  # 蛇身占的格子，撞自己查这里
 
 # -----------------------
 # 工具函数
@@ -59,13 +63,13 @@ def update_score():
 
 def reset_game():
     global score, best_score
-    time.sleep(0.6)
+    print(loop.summary())
+    with loop.hold():
+        time.sleep(0.6)
 
     head.goto(0, 0)
     head.direction = "stop"
 
-    for seg in segments:
-        seg.goto(1000, 1000)
     segments.clear()
 
     if score > best_score:
@@ -128,7 +132,8 @@ wn.onkeypress(go_right, "Right")
 # -----------------------
 # 主循环
 # -----------------------
-while True:
+def tick():
+    global score
     wn.update()
 
     # 撞墙检测
@@ -141,29 +146,23 @@ while True:
         fx, fy = random_food_pos()
         food.goto(fx, fy)
 
-        new_seg = turtle.Turtle()
-        new_seg.speed(0)
-        new_seg.shape("square")
-        new_seg.color("green")
-        new_seg.penup()
-        segments.append(new_seg)
+        segments.grow("green")
 
         score += 10
         update_score()
 
-    # 移动身体：从尾到头跟随
-    for i in range(len(segments) - 1, 0, -1):
-        segments[i].goto(segments[i - 1].xcor(), segments[i - 1].ycor())
-    if segments:
-        segments[0].goto(head.xcor(), head.ycor())
+    # 移动身体：尾巴那节搬到蛇头的位置
+    segments.follow(head.xcor(), head.ycor())
 
     # 移动蛇头
     move()
 
     # 撞到自己
-    for seg in segments:
-        if seg.distance(head) < 15:
-            reset_game()
-            break
+    if segments.hits(head.xcor(), head.ycor()):
+        reset_game()
+
 
-    time.sleep(DELAY)
\ No newline at end of file
+# 每 DELAY 秒一步，对准绝对时间；两步之间 Tk 处理按键
+loop = TickLoop(wn, tick, lambda: DELAY)
+loop.start()
+wn.mainloop()
@@ -1,8 +1,9 @@
 import turtle
-import time
 import random
 from dataclasses import dataclass
 
+from snake_turtle import GridIndex, SnakeBody, TickLoop, TurtlePool
+
 # ---------------------------
 # 配置
 # ---------------------------
@@ -84,7 +85,8 @@ food.color(COL_FOOD)
 food.penup()
 food.speed(0)
 
-segments = []
+pieces = TurtlePool("square")  # 蛇身方块，重开时收回复用
+segments = SnakeBody(pieces, GridIndex(GRID))  # 蛇身占的格子，撞自己查这里
 
 # ---------------------------
 # 工具函数
@@ -163,8 +165,6 @@ def reset_entities():
     head.goto(0, 0)
     head.direction = "stop"
 
-    for seg in segments:
-        seg.goto(10000, 10000)
     segments.clear()
 
     food.goto(*random_pos())
@@ -182,12 +182,8 @@ def reset_game(keep_best=True):
     show_start_screen()
 
 def add_segment():
-    seg = turtle.Turtle()
-    seg.shape("square")
-    seg.color(COL_SNAKE_BODY)
-    seg.penup()
-    seg.speed(0)
-    segments.append(seg)
+    # 下一步在蛇头后面长出来
+    segments.grow(COL_SNAKE_BODY)
 
 def set_direction(new_dir):
     if not state.running or state.paused or state.game_over:
@@ -237,6 +233,7 @@ def game_over():
     update_hud()
     hud.goto(0, 10)
     hud.write("按 R 重新开始", align="center", font=("Consolas", 18, "normal"))
+    print(loop.summary())
 
 def eat_food():
     state.score += 10
@@ -277,15 +274,12 @@ show_start_screen()
 # ---------------------------
 # 主循环
 # ---------------------------
-while True:
+def tick():
     wn.update()
 
     if state.running and (not state.paused) and (not state.game_over):
-        # 身体跟随
-        for i in range(len(segments) - 1, 0, -1):
-            segments[i].goto(segments[i - 1].xcor(), segments[i - 1].ycor())
-        if segments:
-            segments[0].goto(head.xcor(), head.ycor())
+        # 身体跟随：尾巴那节搬到蛇头的位置
+        segments.follow(head.xcor(), head.ycor())
 
         move_head()
 
@@ -298,9 +292,11 @@ while True:
             eat_food()
 
         # 撞自己
-        for seg in segments:
-            if seg.distance(head) < 10:
-                game_over()
-                break
+        if segments.hits(head.xcor(), head.ycor()):
+            game_over()
+
 
-    time.sleep(state.delay)
\ No newline at end of file
+# 每 state.delay 秒一步（吃到食物会变快），对准绝对时间；两步之间 Tk 处理按键
+loop = TickLoop(wn, tick, lambda: state.delay)
+loop.start()
+wn.mainloop()
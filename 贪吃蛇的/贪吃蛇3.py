@@ -1,10 +1,10 @@
 import turtle
 import time
 import random
-import json
-import os
 from dataclasses import dataclass, field
-from datetime import datetime
+
+from snake_scores import STORE
+from snake_turtle import GridIndex, SnakeBody, TickLoop, TurtlePool
 
 # ---------------------------
 # 基础配置
@@ -17,8 +17,6 @@ HUD_TOP_PAD = 55
 PLAY_BOTTOM_PAD = 70
 PLAY_SIDE_PAD = 30
 
-SAVE_FILE = "snake_scores.json"
-
 DIFFICULTY = {
     "Easy": 0.13,
     "Normal": 0.10,
@@ -101,42 +99,7 @@ def beep(freq=900, dur=70):
 # ---------------------------
 # 持久化（排行榜/最高分/设置）
 # ---------------------------
-def load_save():
-    if not os.path.exists(SAVE_FILE):
-        return {"best": 0, "top": [], "settings": {}}
-    try:
-        with open(SAVE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "top" not in data:
-            data["top"] = []
-        if "best" not in data:
-            data["best"] = 0
-        if "settings" not in data:
-            data["settings"] = {}
-        return data
-    except Exception:
-        return {"best": 0, "top": [], "settings": {}}
-
-def save_save(data):
-    try:
-        with open(SAVE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-def add_score_to_top(score: int):
-    data = load_save()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    data["top"].append({"score": int(score), "time": now})
-    data["top"].sort(key=lambda x: x["score"], reverse=True)
-    data["top"] = data["top"][:10]
-    data["best"] = max(int(data.get("best", 0)), int(score))
-    save_save(data)
-
-def clear_top():
-    data = load_save()
-    data["top"] = []
-    save_save(data)
+# 存档在 snake_scores.STORE 里：启动时读一次，之后都走内存，改动写穿到磁盘
 
 # ---------------------------
 # 游戏状态
@@ -186,9 +149,8 @@ class State:
 state = State()
 
 # 载入 best & settings
-save_data = load_save()
-state.best = int(save_data.get("best", 0))
-settings = save_data.get("settings", {})
+state.best = STORE.best
+settings = STORE.settings
 state.difficulty_name = settings.get("difficulty_name", state.difficulty_name)
 state.base_delay = float(DIFFICULTY.get(state.difficulty_name, DIFFICULTY["Normal"]))
 state.delay = state.base_delay
@@ -201,8 +163,7 @@ state.skin_index = int(settings.get("skin_index", state.skin_index))
 state.custom_colors = dict(settings.get("custom_colors", {}))
 
 def persist_settings():
-    data = load_save()
-    data["settings"] = {
+    STORE.set_settings({
         "difficulty_name": state.difficulty_name,
         "wrap_walls": state.wrap_walls,
         "obstacles": state.obstacles,
@@ -211,9 +172,7 @@ def persist_settings():
         "level_mode": state.level_mode,
         "skin_index": state.skin_index,
         "custom_colors": state.custom_colors,
-    }
-    data["best"] = max(int(data.get("best", 0)), int(state.best))
-    save_save(data)
+    }, best=state.best)
 
 # ---------------------------
 # turtle 初始化
@@ -254,7 +213,11 @@ powerup.penup()
 powerup.speed(0)
 powerup.kind = None  # type: ignore[attr-defined]
 
-segments = []
+# 蛇身、静态障碍、移动障碍都是方块，共用一个池：重开/换关时收回，下次再拿出来
+pieces = TurtlePool("square")
+# 蛇身、静态障碍、移动障碍各自占了哪些格子（整数格子坐标），碰撞判断都查这里
+occupied = GridIndex(GRID)
+segments = SnakeBody(pieces, occupied)
 
 # 障碍物：静态格子 + 移动障碍（龟）
 obstacle_cells = set()
@@ -462,11 +425,11 @@ wn.onscreenclick(on_click)
 # ---------------------------
 def clear_obstacles():
     obstacle_cells.clear()
-    for t in obstacle_turtles:
-        t.goto(10000, 10000)
-    obstacle_turtles.clear()
+    occupied.clear("obstacle")
+    occupied.clear("moving")
+    pieces.release_all(obstacle_turtles)
     for mo in moving_obs:
-        mo["t"].goto(10000, 10000)
+        pieces.release(mo["t"])
     moving_obs.clear()
 
 def generate_static_obstacles(count):
@@ -486,26 +449,18 @@ def generate_static_obstacles(count):
             continue
         obstacle_cells.add(cell)
 
+    color = skin()["obstacle"]
     for (x, y) in obstacle_cells:
-        t = turtle.Turtle()
-        t.shape("square")
-        t.penup()
-        t.speed(0)
-        t.color(skin()["obstacle"])
-        t.goto(x, y)
-        obstacle_turtles.append(t)
+        obstacle_turtles.append(pieces.acquire(color, (x, y)))
+        occupied.add("obstacle", x, y)
 
 def generate_moving_obstacles(count):
     if not (state.obstacles and state.moving_obstacles):
         return
     for _ in range(count):
         x, y = random_cell()
-        t = turtle.Turtle()
-        t.shape("square")
-        t.penup()
-        t.speed(0)
-        t.color(skin()["obstacle"])
-        t.goto(x, y)
+        t = pieces.acquire(skin()["obstacle"], (x, y))
+        occupied.add("moving", x, y)
         dx, dy = random.choice([(GRID, 0), (-GRID, 0), (0, GRID), (0, -GRID)])
         moving_obs.append({"t": t, "dx": dx, "dy": dy})
 
@@ -533,15 +488,11 @@ def move_moving_obstacles():
             nx = t.xcor() + mo["dx"]
             ny = t.ycor() + mo["dy"]
 
+        occupied.move("moving", (t.xcor(), t.ycor()), (nx, ny))
         t.goto(nx, ny)
 
 def obstacle_hit(x, y):
-    if (x, y) in obstacle_cells:
-        return True
-    for mo in moving_obs:
-        if mo["t"].xcor() == x and mo["t"].ycor() == y:
-            return True
-    return False
+    return occupied.has("obstacle", x, y) or occupied.has("moving", x, y)
 
 # ---------------------------
 # 道具系统
@@ -575,9 +526,8 @@ def maybe_spawn_powerup():
         return
     if head.distance((x, y)) < GRID * 2:
         return
-    for seg in segments:
-        if seg.distance((x, y)) < 1:
-            return
+    if segments.hits(x, y):
+        return
 
     powerup.kind = kind_code  # type: ignore[attr-defined]
     powerup.goto(x, y)
@@ -614,8 +564,6 @@ def current_delay():
 # 蛇/游戏逻辑
 # ---------------------------
 def clear_snake():
-    for seg in segments:
-        seg.goto(10000, 10000)
     segments.clear()
 
 def reset_entities():
@@ -664,12 +612,8 @@ def set_direction(new_dir):
         head.direction = new_dir
 
 def add_segment():
-    seg = turtle.Turtle()
-    seg.shape("square")
-    seg.penup()
-    seg.speed(0)
-    seg.color(skin()["body"])
-    segments.append(seg)
+    # 下一步在蛇头后面长出来
+    segments.grow(skin()["body"])
 
 def countdown():
     # 3 秒倒计时
@@ -698,7 +642,8 @@ def start_game():
     state.delay = state.base_delay
     recompute_level()
     rebuild_level_features()
-    countdown()
+    with loop.hold():
+        countdown()
     beep(900, 60)
 
 def toggle_pause():
@@ -714,14 +659,16 @@ def game_over():
     state.paused = False
 
     state.best = max(state.best, state.score)
-    add_score_to_top(state.score)
-    state.best = max(state.best, int(load_save().get("best", state.best)))
+    STORE.add_score(state.score)
+    state.best = max(state.best, STORE.best)
 
     update_hud()
-    death_animation()
-    draw_center_text("GAME OVER\nPress R to Restart\nPress M for Menu", y=20, size=20)
-    beep(300, 120)
-    beep(220, 140)
+    with loop.hold():
+        death_animation()
+        draw_center_text("GAME OVER\nPress R to Restart\nPress M for Menu", y=20, size=20)
+        beep(300, 120)
+        beep(220, 140)
+    print(loop.summary())
 
 def reset_game():
     state.best = max(state.best, state.score)
@@ -775,10 +722,8 @@ def eat_food():
         ok = True
         if head.distance((x, y)) < GRID * 2:
             ok = False
-        for seg in segments:
-            if seg.distance((x, y)) < 1:
-                ok = False
-                break
+        if segments.hits(x, y):
+            ok = False
         if ok or tries > 500:
             food.goto(x, y)
             break
@@ -812,10 +757,7 @@ def move_head():
     head.goto(x, y)
 
 def collides_with_self():
-    for seg in segments:
-        if seg.distance(head) < 10:
-            return True
-    return False
+    return segments.hits(head.xcor(), head.ycor())
 
 def collides_with_wall():
     if state.wrap_walls or active_buff("wrap"):
@@ -884,8 +826,7 @@ def show_scores_screen():
     update_hud()
     clear_buttons()
 
-    data = load_save()
-    top = data.get("top", [])
+    top = STORE.top
 
     draw_center_text("Top 10 Scores", y=220, size=24)
     lines = []
@@ -901,9 +842,15 @@ def show_scores_screen():
     draw_button(0, -210, 280, 52, "Clear Top10", clear_top_and_refresh)
 
 def clear_top_and_refresh():
-    clear_top()
+    # 排行榜页面由 STORE 的改动通知重画
+    STORE.clear_top()
     beep(700, 70)
-    show_scores_screen()
+
+def on_scores_changed(store):
+    if state.show_scores:
+        show_scores_screen()
+
+STORE.subscribe(on_scores_changed)
 
 def show_settings_screen():
     state.show_menu = False
@@ -1084,15 +1031,12 @@ show_main_menu()
 # ---------------------------
 # 主循环
 # ---------------------------
-while True:
+def tick():
     wn.update()
 
     if state.running and (not state.paused) and (not state.game_over):
-        # 移动身体：尾跟头
-        for i in range(len(segments) - 1, 0, -1):
-            segments[i].goto(segments[i - 1].xcor(), segments[i - 1].ycor())
-        if segments:
-            segments[0].goto(head.xcor(), head.ycor())
+        # 移动身体：尾巴那节搬到蛇头的位置
+        segments.follow(head.xcor(), head.ycor())
 
         # 移动蛇头
         move_head()
@@ -1119,4 +1063,8 @@ while True:
         if powerup.isvisible() and head.distance(powerup) < 15:
             apply_powerup(powerup.kind)
 
-    time.sleep(current_delay())
\ No newline at end of file
+
+# 每 current_delay() 秒一步（随速度/减速道具变化），对准绝对时间；两步之间 Tk 处理按键
+loop = TickLoop(wn, tick, current_delay)
+loop.start()
+wn.mainloop()
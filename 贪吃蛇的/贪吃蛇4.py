@@ -1,25 +1,34 @@
 import pygame
-import random
-import json
+import argparse
+import itertools
 import os
-from dataclasses import dataclass
+import time
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
 from datetime import datetime
 
+import snake_replay
+from snake_autopilot import Autopilot
+from snake_core import W, H, GRID, BIG_PLAY, DIFFICULTY, PLAY, Buffs, Settings, SnakeGame
+from snake_profiler import FrameProfiler
+from snake_scores import STORE
+from snake_sim import SimThread
+
 # =========================
 # 基础配置
 # =========================
-W, H = 1000, 720
 FPS = 60
-GRID = 20
+IDLE_WAIT = 1000  # 空闲时最长阻塞多久（毫秒）
 
-SAVE_FILE = "snake_scores.json"
+REPLAY_DIR = "replays"
+
+
+@dataclass
+class DisplaySettings:
+    # 只跟这个 pygame 前端有关的选项，和对局规则无关，不放进 snake_core.Settings；和它一起存进存档
+    dirty_rects: bool = False  # 只提交变化区域
+    big_board: bool = False    # 用 BIG_PLAY 大地图
 
-DIFFICULTY = {
-    "Easy": 9,     # 每秒移动次数（tick）
-    "Normal": 12,
-    "Hard": 16,
-    "Insane": 20,
-}
 
 NEON = {
     "bg": (8, 12, 20),
@@ -36,64 +45,193 @@ NEON = {
     "danger": (255, 80, 80),
 }
 
-LEVEL_STEP = 60
-MAX_LEVEL = 10
-POWERUP_T = 6.0
-
 
 # =========================
-# 存档：Top10 + settings
+# 回放
 # =========================
-def load_save():
-    if not os.path.exists(SAVE_FILE):
-        return {"best": 0, "top": [], "settings": {}}
+def save_replay(game):
+    # 只存种子 + 转向输入，几 KB 即可完整重演一局
     try:
-        with open(SAVE_FILE, "r", encoding="utf-8") as f:
-            d = json.load(f)
-        d.setdefault("best", 0)
-        d.setdefault("top", [])
-        d.setdefault("settings", {})
-        return d
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"{stamp}-{game.score}-{game.seed:08x}.snkr"
+        snake_replay.save(os.path.join(REPLAY_DIR, name), snake_replay.from_game(game))
+        return name
     except Exception:
-        return {"best": 0, "top": [], "settings": {}}
+        return None
 
 
-def save_save(d):
+def prune_replays():
+    # 掉出 Top 列表的记录，回放文件也跟着删掉，replays/ 里最多留 TOP_N 个
+    keep = {e.get("replay") for e in STORE.top}
     try:
-        with open(SAVE_FILE, "w", encoding="utf-8") as f:
-            json.dump(d, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        names = os.listdir(REPLAY_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(".snkr") and name not in keep:
+            try:
+                os.remove(os.path.join(REPLAY_DIR, name))
+            except OSError:
+                pass
 
 
-def add_top_score(score):
-    d = load_save()
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    d["top"].append({"score": int(score), "time": now})
-    d["top"].sort(key=lambda x: x["score"], reverse=True)
-    d["top"] = d["top"][:10]
-    d["best"] = max(int(d.get("best", 0)), int(score))
-    save_save(d)
+# =========================
+# UI：绘制辅助
+# =========================
+class LRUCache:
+    """按 key 缓存渲染好的 Surface，超出容量淘汰最久没用的；capacity=0 表示不缓存。"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, make):
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return item
+        self.misses += 1
+        item = make()
+        if self.capacity > 0:
+            self.items[key] = item
+            if len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+        return item
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+GLOW_CACHE = LRUCache(128)
+TEXT_CACHE = LRUCache(256)
+
+
+def render_text(font, text, color, antialias=True):
+    # 同一字体/文字/颜色只渲染一次；HUD 里只有变了的数字才会重新渲染
+    return TEXT_CACHE.get((font, text, color, antialias), lambda: font.render(text, antialias, color))
+
+
+def make_glow_sprite(w, h, color, radius, glow, alpha):
+    # 光圈是一层套一层、同一颜色的圆角矩形，依次叠加后每个像素的不透明度只取决于最里层覆盖它的那圈：
+    # 由外向内直接写入累计不透明度，再画上描边，整个光晕就是一张图
+    sprite = pygame.Surface((w + 2 * glow, h + 2 * glow), pygame.SRCALPHA)
+    clear = 1.0
+    for i in range(glow, 0, -2):
+        clear *= 1.0 - max(0, alpha - i * 6) / 255.0
+        r = pygame.Rect(glow - i, glow - i, w + 2 * i, h + 2 * i)
+        pygame.draw.rect(sprite, (*color, round(255 * (1.0 - clear))), r, border_radius=radius + i)
+    pygame.draw.rect(sprite, color, (glow, glow, w, h), border_radius=radius, width=2)
+    return sprite
 
 
-def clear_top():
-    d = load_save()
-    d["top"] = []
-    save_save(d)
+def draw_glow_rect(surf, rect, color, radius=14, glow=10, alpha=80):
+    x, y, w, h = rect
+    color = tuple(color)
+    sprite = GLOW_CACHE.get((w, h, color, radius, glow, alpha),
+                            lambda: make_glow_sprite(w, h, color, radius, glow, alpha))
+    surf.blit(sprite, (x - glow, y - glow))
 
 
 # =========================
-# UI：绘制辅助
+# 格子贴图集：每套皮肤预渲染一次，整层用一次 blits 画完
 # =========================
-def draw_glow_rect(surf, rect, color, radius=14, glow=10, alpha=80):
-    x, y, w, h = rect
-    for i in range(glow, 0, -2):
-        r = pygame.Rect(x - i, y - i, w + 2 * i, h + 2 * i)
-        c = (*color, max(0, alpha - i * 6))
-        tmp = pygame.Surface((r.w, r.h), pygame.SRCALPHA)
-        pygame.draw.rect(tmp, c, tmp.get_rect(), border_radius=radius + i)
-        surf.blit(tmp, (r.x, r.y))
-    pygame.draw.rect(surf, color, rect, border_radius=radius, width=2)
+SKIN = {
+    "head": NEON["neon_green"],
+    "body": (40, 160, 140),
+    "obstacle": NEON["neon_yellow"],
+    "obstacle_edge": (40, 30, 10),
+    "food": NEON["neon_pink"],
+    "inv": NEON["neon_cyan"],
+    "wrap": NEON["neon_cyan"],
+    "slow": NEON["neon_green"],
+    "double": NEON["neon_pink"],
+}
+
+
+class TileAtlas:
+    """
+    一套皮肤的格子贴图：tiles[name] = (surface, offset)，
+    贴到格子 (x, y) 时画在 (x + offset, y + offset)；带光晕的贴图把光晕和实心块合成在同一张里。
+    道具用它的种类名（inv/slow/wrap/double）取贴图，没有单独配色的种类用 "double" 的颜色。
+    """
+
+    def __init__(self, skin, grid=GRID):
+        self.skin = skin
+        self.grid = grid
+        self.tiles = {
+            "head": self._glowing(skin["head"], 12),
+            "body": self._cell(skin["body"]),
+            "obstacle": self._obstacle(skin["obstacle"], skin["obstacle_edge"]),
+            "food": self._glowing(skin["food"], 10),
+        }
+        for kind in Buffs.NAMES:
+            self.tiles[kind] = self._glowing(skin.get(kind, skin["double"]), 10)
+
+    def _cell(self, color):
+        sprite = pygame.Surface((self.grid, self.grid), pygame.SRCALPHA)
+        pygame.draw.rect(sprite, color, sprite.get_rect(), border_radius=8)
+        return sprite.convert_alpha(), 0
+
+    def _obstacle(self, color, edge):
+        sprite = pygame.Surface((self.grid, self.grid), pygame.SRCALPHA)
+        pygame.draw.rect(sprite, color, sprite.get_rect(), border_radius=6)
+        pygame.draw.rect(sprite, edge, sprite.get_rect(), width=2, border_radius=6)
+        return sprite.convert_alpha(), 0
+
+    def _glowing(self, color, glow):
+        sprite = make_glow_sprite(self.grid, self.grid, color, 10, glow, 90)
+        pygame.draw.rect(sprite, color, (glow, glow, self.grid, self.grid), border_radius=10)
+        return sprite.convert_alpha(), -glow
+
+    def tile(self, name):
+        return self.tiles.get(name) or self.tiles["double"]
+
+    def batch(self, name, cells, dx=0, dy=0):
+        # [(surface, (x, y)), ...]，直接交给 blit_batch；(dx, dy) 是棋盘坐标到屏幕坐标的偏移
+        sprite, off = self.tile(name)
+        dx += off
+        dy += off
+        return [(sprite, (x + dx, y + dy)) for x, y in cells]
+
+
+ATLAS_CACHE = LRUCache(4)
+
+
+def tile_atlas(skin=SKIN):
+    return ATLAS_CACHE.get(tuple(sorted(skin.items())), lambda: TileAtlas(skin))
+
+
+def blit_batch(surf, seq):
+    # pygame-ce 有更快的 fblits；原版 pygame 用 blits 并且不要返回 rect 列表
+    if hasattr(surf, "fblits"):
+        surf.fblits(seq)
+    else:
+        surf.blits(seq, doreturn=False)
+
+
+def cells_in_view(cells, play, view):
+    # cells（set/dict）里落在 view 矩形（棋盘坐标）内的格子。
+    # 集合比视口小就逐个过滤，否则扫视口里的每一格去查集合：两种都不超过视口的格子数
+    x0 = play.x + max(0, (view.x - play.x) // GRID) * GRID
+    y0 = play.y + max(0, (view.y - play.y) // GRID) * GRID
+    x1 = min(view.right, play.right)
+    y1 = min(view.bottom, play.bottom)
+    if len(cells) <= ((x1 - x0) // GRID + 1) * ((y1 - y0) // GRID + 1):
+        return [c for c in cells if x0 <= c[0] < x1 and y0 <= c[1] < y1]
+    return [(x, y) for y in range(y0, y1, GRID) for x in range(x0, x1, GRID) if (x, y) in cells]
+
+
+def lerp_cell(a, b, alpha):
+    # 相邻格之间线性插值；穿墙时是跳变，直接取终点
+    if abs(a[0] - b[0]) + abs(a[1] - b[1]) > GRID:
+        return b
+    return (round(a[0] + (b[0] - a[0]) * alpha), round(a[1] + (b[1] - a[1]) * alpha))
 
 
 def draw_card(surf, rect, fill, stroke):
@@ -120,7 +258,7 @@ class Button:
         draw_card(surf, self.rect, fill, self.accent if self.hover else NEON["stroke"])
         draw_glow_rect(surf, self.rect, self.accent if self.hover else NEON["stroke"],
                        glow=10 if self.hover else 6, alpha=90)
-        label = font.render(self.text, True, NEON["text"])
+        label = render_text(font, self.text, NEON["text"])
         surf.blit(label, label.get_rect(center=self.rect.center))
 
 
@@ -141,7 +279,7 @@ class Toggle:
 
     def draw(self, surf, small):
         draw_card(surf, self.rect, NEON["panel"], NEON["stroke"])
-        lab = small.render(self.label, True, NEON["muted"])
+        lab = render_text(small, self.label, NEON["muted"])
         surf.blit(lab, (self.rect.x + 16, self.rect.y + 17))
 
         v = self.getv()
@@ -191,7 +329,7 @@ class Segmented:
 
     def draw(self, surf, small):
         draw_card(surf, self.rect, NEON["panel"], NEON["stroke"])
-        lab = small.render(self.label, True, NEON["muted"])
+        lab = render_text(small, self.label, NEON["muted"])
         surf.blit(lab, (self.rect.x + 16, self.rect.y + 17))
 
         current = self.getv()
@@ -202,225 +340,10 @@ class Segmented:
             stroke = self.accent if active else (NEON["stroke"] if not hover else self.accent)
             pygame.draw.rect(surf, fill, r, border_radius=12)
             pygame.draw.rect(surf, stroke, r, border_radius=12, width=2)
-            txt = small.render(opt, True, NEON["text"] if active else NEON["muted"])
+            txt = render_text(small, opt, NEON["text"] if active else NEON["muted"])
             surf.blit(txt, txt.get_rect(center=r.center))
 
 
-# =========================
-# 游戏状态结构
-# =========================
-@dataclass
-class Settings:
-    difficulty: str = "Normal"
-    wrap: bool = False
-    obstacles: bool = True
-    sound: bool = True
-    level_mode: bool = True
-
-
-@dataclass
-class Buffs:
-    inv_until: float = 0.0
-    slow_until: float = 0.0
-    wrap_until: float = 0.0
-    double_until: float = 0.0
-
-
-# =========================
-# 游戏核心
-# =========================
-class SnakeGame:
-    def __init__(self, settings: Settings, best=0):
-        self.settings = settings
-        self.best = best
-        self.reset()
-
-    def reset(self):
-        self.score = 0
-        self.level = 1
-        self.tick_rate = float(DIFFICULTY[self.settings.difficulty])
-        self.accum = 0.0
-        self.running = False
-        self.paused = False
-        self.game_over = False
-
-        self.buffs = Buffs()
-
-        self.play = pygame.Rect(280, 90, W - 320, H - 130)
-
-        cx = self.play.x + (self.play.w // 2 // GRID) * GRID
-        cy = self.play.y + (self.play.h // 2 // GRID) * GRID
-        self.dir = (0, 0)
-        self.snake = [(cx, cy)]
-        self.grow = 0
-
-        self.obstacles = set()
-        self.food = self.rand_cell(avoid=set(self.snake))
-        if self.settings.obstacles:
-            self.rebuild_obstacles()
-
-        self.powerup = None  # (kind, (x,y))
-
-    def now(self):
-        return pygame.time.get_ticks() / 1000.0
-
-    def buff_active(self, name):
-        t = self.now()
-        b = self.buffs
-        return {
-            "inv": t < b.inv_until,
-            "slow": t < b.slow_until,
-            "wrap": t < b.wrap_until,
-            "double": t < b.double_until,
-        }.get(name, False)
-
-    def effective_wrap(self):
-        return self.settings.wrap or self.buff_active("wrap")
-
-    def effective_tick(self):
-        base = self.tick_rate
-        if self.buff_active("slow"):
-            base = max(6.0, base - 5.0)
-        return base
-
-    def rand_cell(self, avoid=set()):
-        for _ in range(2000):
-            x = random.randrange(self.play.x, self.play.right, GRID)
-            y = random.randrange(self.play.y, self.play.bottom, GRID)
-            x = (x // GRID) * GRID
-            y = (y // GRID) * GRID
-            if (x, y) not in avoid:
-                return (x, y)
-        return (self.play.x, self.play.y)
-
-    def rebuild_obstacles(self):
-        self.obstacles.clear()
-        count = 12 + (self.level - 1) * 3
-        avoid = set(self.snake) | {self.food}
-        for _ in range(count * 12):
-            if len(self.obstacles) >= count:
-                break
-            c = self.rand_cell(avoid=avoid | self.obstacles)
-            if abs(c[0] - self.snake[0][0]) <= GRID * 2 and abs(c[1] - self.snake[0][1]) <= GRID * 2:
-                continue
-            self.obstacles.add(c)
-
-    def set_dir(self, dx, dy):
-        if not self.running or self.paused or self.game_over:
-            return
-        if self.dir == (0, 0):
-            self.dir = (dx, dy)
-            return
-        if (dx, dy) == (-self.dir[0], -self.dir[1]):
-            return
-        self.dir = (dx, dy)
-
-    def start(self):
-        self.running = True
-        self.paused = False
-        self.game_over = False
-
-    def toggle_pause(self):
-        if not self.running or self.game_over:
-            return
-        self.paused = not self.paused
-
-    def spawn_powerup(self):
-        if self.powerup is not None:
-            return
-        p = min(0.20, 0.08 + (self.level - 1) * 0.01)
-        if random.random() > p:
-            return
-        kind = random.choice(["inv", "slow", "wrap", "double", "bonus"])
-        avoid = set(self.snake) | {self.food} | self.obstacles
-        pos = self.rand_cell(avoid=avoid)
-        self.powerup = (kind, pos)
-
-    def apply_powerup(self, kind):
-        t = self.now()
-        if kind == "inv":
-            self.buffs.inv_until = t + POWERUP_T
-        elif kind == "slow":
-            self.buffs.slow_until = t + POWERUP_T
-        elif kind == "wrap":
-            self.buffs.wrap_until = t + POWERUP_T
-        elif kind == "double":
-            self.buffs.double_until = t + POWERUP_T
-        elif kind == "bonus":
-            self.score += 30 * (2 if self.buff_active("double") else 1)
-        self.powerup = None
-
-    def step(self):
-        if not self.running or self.paused or self.game_over:
-            return
-        dx, dy = self.dir
-        if (dx, dy) == (0, 0):
-            return
-
-        hx, hy = self.snake[0]
-        nx, ny = hx + dx * GRID, hy + dy * GRID
-
-        if self.effective_wrap():
-            if nx < self.play.x: nx = self.play.right - GRID
-            if nx >= self.play.right: nx = self.play.x
-            if ny < self.play.y: ny = self.play.bottom - GRID
-            if ny >= self.play.bottom: ny = self.play.y
-
-        if not self.effective_wrap():
-            if not (self.play.x <= nx < self.play.right and self.play.y <= ny < self.play.bottom):
-                if not self.buff_active("inv"):
-                    self.game_over = True
-                    return
-
-        new_head = (nx, ny)
-
-        if not self.buff_active("inv"):
-            if new_head in self.obstacles:
-                self.game_over = True
-                return
-            if new_head in self.snake:
-                self.game_over = True
-                return
-
-        self.snake.insert(0, new_head)
-
-        if new_head == self.food:
-            mult = 2 if self.buff_active("double") else 1
-            self.score += 10 * mult
-            self.grow += 1
-
-            self.tick_rate = min(26.0, self.tick_rate + 0.35)
-
-            if self.settings.level_mode:
-                new_level = min(MAX_LEVEL, 1 + self.score // LEVEL_STEP)
-                if new_level != self.level:
-                    self.level = new_level
-                    if self.settings.obstacles:
-                        self.rebuild_obstacles()
-
-            avoid = set(self.snake) | self.obstacles
-            self.food = self.rand_cell(avoid=avoid)
-        else:
-            if self.powerup and new_head == self.powerup[1]:
-                self.apply_powerup(self.powerup[0])
-
-            if self.grow > 0:
-                self.grow -= 1
-            else:
-                self.snake.pop()
-
-        self.spawn_powerup()
-
-    def update(self, dt):
-        if not self.running or self.paused or self.game_over:
-            return
-        self.accum += dt
-        tick = 1.0 / self.effective_tick()
-        while self.accum >= tick:
-            self.accum -= tick
-            self.step()
-
-
 # =========================
 # App：场景管理
 # =========================
@@ -435,10 +358,12 @@ class App:
         self.font = pygame.font.SysFont("Consolas", 18)
         self.font_small = pygame.font.SysFont("Consolas", 15)
 
-        data = load_save()
-        self.best = int(data.get("best", 0))
+        # 存档只在这里读一次；排行榜改动由 STORE 通知
+        self.best = STORE.best
+        self.score_lines = None
+        STORE.subscribe(self.on_scores_changed)
 
-        s = data.get("settings", {})
+        s = STORE.settings
         self.settings = Settings(
             difficulty=s.get("difficulty", "Normal"),
             wrap=bool(s.get("wrap", False)),
@@ -446,23 +371,53 @@ class App:
             sound=bool(s.get("sound", True)),
             level_mode=bool(s.get("level_mode", True)),
         )
+        self.display_settings = DisplaySettings(
+            dirty_rects=bool(s.get("dirty_rects", False)),
+            big_board=bool(s.get("big_board", False)),
+        )
 
         self.scene = "menu"  # menu / settings / scores / game
-        self.game = SnakeGame(self.settings, best=self.best)
+        self.autopilot = False
+        self.assisted = False  # 本局开过自动驾驶：不进排行榜
+        self.profiler = None   # F2 打开的帧耗时分析
+        self.profiler_panel = None
+        self.sim_thread = False  # --sim-thread：对局在自己的线程里按节拍推进，渲染只读快照
+        self.sim = None
+        self.drawn = None        # 最近一帧画的是哪一份状态
+        self.last_ticks = 0
+        self.last_dropped = 0    # 模拟线程上一帧时已经丢掉的整拍数
+        self.frame_cost = 0.0
+        self.game = self.new_game()
         self.controls = []
         self.build_ui()
 
+        self.static = None
+        self.static_key = None
+        self.play_area = None
+        self.play_area_key = None
+        self.overlays = {}
+
+        # 脏矩形模式（设置里开关）；F3 描出每帧提交的区域
+        self.items = None
+        self.prev_items = None
+        self.full_redraw = True
+        self.show_dirty = False
+        self.dirty_rects = []
+
     def persist_settings(self):
-        d = load_save()
-        d["settings"] = {
+        STORE.set_settings({
             "difficulty": self.settings.difficulty,
             "wrap": self.settings.wrap,
             "obstacles": self.settings.obstacles,
             "sound": self.settings.sound,
             "level_mode": self.settings.level_mode,
-        }
-        d["best"] = max(int(d.get("best", 0)), int(self.best))
-        save_save(d)
+            "dirty_rects": self.display_settings.dirty_rects,
+            "big_board": self.display_settings.big_board,
+        }, best=self.best)
+
+    def on_scores_changed(self, store):
+        self.best = max(self.best, store.best)
+        self.score_lines = None
 
     def build_ui(self):
         self.controls = []
@@ -483,9 +438,13 @@ class App:
                        accent=NEON["neon_yellow"]),
                 Toggle((60, 400, 400, 56), "Level mode", lambda: self.settings.level_mode, self.set_level,
                        accent=NEON["neon_pink"]),
-                Toggle((60, 470, 400, 56), "Sound", lambda: self.settings.sound, self.set_sound,
+                Toggle((60, 470, 195, 56), "Sound", lambda: self.settings.sound, self.set_sound,
                        accent=NEON["neon_cyan"]),
+                Toggle((265, 470, 195, 56), "Big board", lambda: self.display_settings.big_board,
+                       self.set_big_board, accent=NEON["neon_green"]),
                 Button((60, 560, 190, 54), "BACK", self.to_menu, accent=NEON["stroke"]),
+                Toggle((260, 560, 200, 54), "Dirty rects", lambda: self.display_settings.dirty_rects,
+                       self.set_dirty_rects, accent=NEON["neon_yellow"]),
             ]
         elif self.scene == "scores":
             self.controls += [
@@ -496,18 +455,60 @@ class App:
             self.controls += [
                 Button((60, 600, 190, 46), "MENU (M)", self.to_menu_from_game, accent=NEON["stroke"]),
                 Button((260, 600, 190, 46), "RESTART (R)", self.restart, accent=NEON["neon_pink"]),
+                Toggle((60, 530, 190, 56), "Auto (P)", lambda: self.autopilot, self.set_autopilot,
+                       accent=NEON["neon_green"]),
             ]
 
+    def new_game(self):
+        g = SnakeGame(self.settings, best=self.best, play=BIG_PLAY if self.display_settings.big_board else PLAY)
+        self.attach_pilot(g, self.autopilot)
+        if self.profiler and not self.sim_thread:
+            g.step = self.profiler.timed("step", g.step)
+        self.assisted = self.autopilot
+        return g
+
+    def attach_pilot(self, g, on):
+        g.pilot = Autopilot(g) if on else None
+
+    # -------- 模拟线程 --------
+    def start_game(self):
+        self.stop_sim()
+        self.game = self.new_game()
+        self.game.start()
+        if self.sim_thread:
+            self.sim = SimThread(self.game).start()
+            self.last_dropped = 0
+
+    def stop_sim(self):
+        # 停下之后 self.game 只有主线程在碰，可以直接读写
+        if self.sim is not None:
+            self.sim.stop()
+            self.sim = None
+
+    def command(self, fn, *args):
+        # 改对局状态都走这里：模拟线程在跑时交给它在两步之间执行
+        if self.sim is not None:
+            self.sim.call(fn, *args)
+        else:
+            fn(*args)
+
+    def view(self):
+        # 渲染用的对局状态：模拟线程最新发布的快照，或者就是 self.game
+        return self.game if self.sim is None else self.sim.front
+
+    def alpha(self, g):
+        if self.sim is None:
+            return g.timer.alpha
+        return g.alpha(time.perf_counter())
+
     # -------- scene actions --------
     def play(self):
         self.scene = "game"
-        self.game = SnakeGame(self.settings, best=self.best)
-        self.game.start()
+        self.start_game()
         self.build_ui()
 
     def restart(self):
-        self.game = SnakeGame(self.settings, best=self.best)
-        self.game.start()
+        self.start_game()
 
     def to_menu(self):
         self.scene = "menu"
@@ -521,17 +522,27 @@ class App:
         self.scene = "scores"
         self.build_ui()
 
-    def to_menu_from_game(self):
-        if self.game.score > 0:
-            add_top_score(self.game.score)
+    def record_score(self):
+        if self.game.score > 0 and not self.assisted:
+            game = self.game
+            if STORE.add_score(game.score, replay=lambda: save_replay(game)):
+                prune_replays()
             self.best = max(self.best, self.game.score)
+
+    def to_menu_from_game(self):
+        self.stop_sim()
+        self.record_score()
         self.scene = "menu"
         self.build_ui()
 
     def clear_scores(self):
-        clear_top()
+        STORE.clear_top()
+        prune_replays()
 
     def quit(self):
+        self.stop_sim()
+        if self.profiler:
+            self.profiler.close()
         pygame.quit()
         raise SystemExit
 
@@ -552,6 +563,20 @@ class App:
         self.settings.sound = v
         self.persist_settings()
 
+    def set_big_board(self, v):
+        self.display_settings.big_board = v
+        self.persist_settings()
+
+    def set_dirty_rects(self, v):
+        self.display_settings.dirty_rects = v
+        self.persist_settings()
+
+    def set_autopilot(self, v):
+        self.autopilot = v
+        self.command(self.attach_pilot, self.game, v)
+        if v:
+            self.assisted = True
+
     def set_level(self, v):
         self.settings.level_mode = v
         self.persist_settings()
@@ -559,32 +584,32 @@ class App:
     # =========================
     # 绘制
     # =========================
-    def draw_background(self):
-        self.screen.fill(NEON["bg"])
+    def draw_background(self, surf):
+        surf.fill(NEON["bg"])
 
         panel = pygame.Rect(30, 30, 240, H - 60)
-        draw_card(self.screen, panel, NEON["panel"], NEON["stroke"])
-        draw_glow_rect(self.screen, panel, NEON["stroke"], glow=8, alpha=70)
+        draw_card(surf, panel, NEON["panel"], NEON["stroke"])
+        draw_glow_rect(surf, panel, NEON["stroke"], glow=8, alpha=70)
 
         main = pygame.Rect(300, 30, W - 330, H - 60)
-        draw_card(self.screen, main, (10, 16, 26), NEON["stroke"])
-        draw_glow_rect(self.screen, main, NEON["stroke"], glow=8, alpha=60)
+        draw_card(surf, main, (10, 16, 26), NEON["stroke"])
+        draw_glow_rect(surf, main, NEON["stroke"], glow=8, alpha=60)
 
         hud = pygame.Rect(320, 50, W - 370, 52)
-        pygame.draw.rect(self.screen, NEON["panel"], hud, border_radius=16)
-        pygame.draw.rect(self.screen, NEON["stroke"], hud, border_radius=16, width=2)
+        pygame.draw.rect(surf, NEON["panel"], hud, border_radius=16)
+        pygame.draw.rect(surf, NEON["stroke"], hud, border_radius=16, width=2)
 
-    def draw_title(self):
-        title = self.font_big.render("SNAKE // NEON", True, NEON["neon_cyan"])
-        self.screen.blit(title, (60, 70))
-        sub = self.font_small.render("Cyber UI • Buttons • Toggles • Top10 Save", True, NEON["muted"])
-        self.screen.blit(sub, (60, 112))
+    def draw_title(self, surf):
+        title = render_text(self.font_big, "SNAKE // NEON", NEON["neon_cyan"])
+        surf.blit(title, (60, 70))
+        sub = render_text(self.font_small, "Cyber UI • Buttons • Toggles • Top10 Save", NEON["muted"])
+        surf.blit(sub, (60, 112))
 
-        best = self.font.render(f"Best: {self.best}", True, NEON["text"])
-        self.screen.blit(best, (60, 150))
+        best = render_text(self.font, f"Best: {self.best}", NEON["text"])
+        surf.blit(best, (60, 150))
 
-        hint = self.font_small.render("Keys: Space Pause | R Restart | M Menu | WASD/Arrows Move", True, NEON["muted"])
-        self.screen.blit(hint, (60, H - 90))
+        hint = render_text(self.font_small, "Keys: Space Pause | R Restart | M Menu | P Autopilot | WASD/Arrows Move", NEON["muted"])
+        surf.blit(hint, (60, H - 90))
 
     def draw_controls(self):
         for c in self.controls:
@@ -592,11 +617,15 @@ class App:
                 c.draw(self.screen, self.font)
             else:
                 c.draw(self.screen, self.font_small)
+            if self.items is not None:
+                state = (getattr(c, "hover", None), getattr(c, "hover_index", None),
+                         c.getv() if hasattr(c, "getv") else None)
+                self.mark(("control", id(c), state), c.rect.inflate(20, 20))
 
-    def draw_menu(self):
+    def draw_menu(self, surf):
         x0, y0 = 340, 130
-        header = self.font_big.render("MAIN MENU", True, NEON["text"])
-        self.screen.blit(header, (x0, y0))
+        header = render_text(self.font_big, "MAIN MENU", NEON["text"])
+        surf.blit(header, (x0, y0))
 
         info = [
             "• Neon UI with hover/glow buttons",
@@ -605,145 +634,220 @@ class App:
             "• Power-ups + Level mode + Obstacles",
         ]
         for i, line in enumerate(info):
-            t = self.font.render(line, True, NEON["muted"])
-            self.screen.blit(t, (x0, y0 + 60 + i * 26))
+            t = render_text(self.font, line, NEON["muted"])
+            surf.blit(t, (x0, y0 + 60 + i * 26))
 
-        tip = self.font.render("Click PLAY to start.", True, NEON["neon_pink"])
-        self.screen.blit(tip, (x0, y0 + 200))
+        tip = render_text(self.font, "Click PLAY to start.", NEON["neon_pink"])
+        surf.blit(tip, (x0, y0 + 200))
 
         hud = pygame.Rect(320, 50, W - 370, 52)
-        status = self.font.render("Ready", True, NEON["text"])
-        self.screen.blit(status, (hud.x + 18, hud.y + 15))
+        status = render_text(self.font, "Ready", NEON["text"])
+        surf.blit(status, (hud.x + 18, hud.y + 15))
 
-    def draw_settings(self):
+    def draw_settings(self, surf):
         x0, y0 = 340, 130
-        header = self.font_big.render("SETTINGS", True, NEON["text"])
-        self.screen.blit(header, (x0, y0))
-        t = self.font.render("All changes are saved locally.", True, NEON["muted"])
-        self.screen.blit(t, (x0, y0 + 54))
+        header = render_text(self.font_big, "SETTINGS", NEON["text"])
+        surf.blit(header, (x0, y0))
+        t = render_text(self.font, "All changes are saved locally.", NEON["muted"])
+        surf.blit(t, (x0, y0 + 54))
+        self.mark("settings_text", (x0, y0, W - x0, 80))
 
         hud = pygame.Rect(320, 50, W - 370, 52)
-        status = self.font.render("Settings", True, NEON["text"])
-        self.screen.blit(status, (hud.x + 18, hud.y + 15))
+        status = render_text(self.font, "Settings", NEON["text"])
+        surf.blit(status, (hud.x + 18, hud.y + 15))
 
-    def draw_scores(self):
+    def draw_scores_static(self, surf):
         x0, y0 = 340, 130
-        header = self.font_big.render("TOP 10 SCORES", True, NEON["text"])
-        self.screen.blit(header, (x0, y0))
+        header = render_text(self.font_big, "TOP 10 SCORES", NEON["text"])
+        surf.blit(header, (x0, y0))
 
-        d = load_save()
-        top = d.get("top", [])
+        hud = pygame.Rect(320, 50, W - 370, 52)
+        status = render_text(self.font, "Leaderboard", NEON["text"])
+        surf.blit(status, (hud.x + 18, hud.y + 15))
 
+    def draw_scores(self):
+        # 排行榜文字只在 STORE 通知改动后重新排版，渲染时不碰磁盘
         box = pygame.Rect(340, 200, W - 390, 320)
+        if self.score_lines is None:
+            top = STORE.top
+            if not top:
+                self.score_lines = [("(No scores yet)", NEON["muted"], (box.x + 20, box.y + 30))]
+            else:
+                self.score_lines = [
+                    (f"{i:>2}.  {item.get('score', 0):>4}   {item.get('time', '')}",
+                     NEON["text"] if i <= 3 else NEON["muted"],
+                     (box.x + 20, box.y + 20 + (i - 1) * 28))
+                    for i, item in enumerate(top[:10], 1)
+                ]
+
         draw_card(self.screen, box, NEON["panel"], NEON["stroke"])
         draw_glow_rect(self.screen, box, NEON["stroke"], glow=6, alpha=60)
+        for line, color, pos in self.score_lines:
+            self.screen.blit(render_text(self.font, line, color), pos)
+        self.mark(("scores", STORE.version), box.inflate(12, 12))
 
-        if not top:
-            t = self.font.render("(No scores yet)", True, NEON["muted"])
-            self.screen.blit(t, (box.x + 20, box.y + 30))
-        else:
-            for i, item in enumerate(top[:10], 1):
-                line = f"{i:>2}.  {item.get('score', 0):>4}   {item.get('time', '')}"
-                t = self.font.render(line, True, NEON["text"] if i <= 3 else NEON["muted"])
-                self.screen.blit(t, (box.x + 20, box.y + 20 + (i - 1) * 28))
+    def draw_play_area(self, surf, play, grid=True):
+        pygame.draw.rect(surf, (10, 16, 26), play, border_radius=18)
+        pygame.draw.rect(surf, NEON["stroke"], play, border_radius=18, width=2)
+        draw_glow_rect(surf, play, NEON["stroke"], glow=6, alpha=50)
 
-        hud = pygame.Rect(320, 50, W - 370, 52)
-        status = self.font.render("Leaderboard", True, NEON["text"])
-        self.screen.blit(status, (hud.x + 18, hud.y + 15))
+        # 网格弱化线（更精致）
+        if grid:
+            self.draw_grid(surf, play, play.x, play.y)
+
+    def draw_grid(self, surf, rect, x0, y0):
+        # 每两格一条线；(x0, y0) 是某条网格线交点的屏幕坐标，只画 rect 范围内的
+        step = GRID * 2
+        for x in range(rect.x + (x0 - rect.x) % step, rect.right, step):
+            pygame.draw.line(surf, (14, 22, 34), (x, rect.y), (x, rect.bottom), 1)
+        for y in range(rect.y + (y0 - rect.y) % step, rect.bottom, step):
+            pygame.draw.line(surf, (14, 22, 34), (rect.x, y), (rect.right, y), 1)
 
     def draw_game(self):
+        g = self.drawn
         # 顶部 HUD
         hud = pygame.Rect(320, 50, W - 370, 52)
-        score = self.font.render(f"Score: {self.game.score}", True, NEON["text"])
-        best = self.font.render(f"Best: {self.best}", True, NEON["muted"])
-        diff = self.font.render(f"Diff: {self.settings.difficulty}", True, NEON["muted"])
-        level = self.font.render(f"Level: {self.game.level}", True, NEON["muted"])
+        score = render_text(self.font, f"Score: {g.score}", NEON["text"])
+        best = render_text(self.font, f"Best: {self.best}", NEON["muted"])
+        diff = render_text(self.font, f"Diff: {self.settings.difficulty}", NEON["muted"])
+        level = render_text(self.font, f"Level: {g.level}", NEON["muted"])
         self.screen.blit(score, (hud.x + 18, hud.y + 15))
         self.screen.blit(best, (hud.x + 170, hud.y + 15))
         self.screen.blit(diff, (hud.x + 320, hud.y + 15))
         self.screen.blit(level, (hud.x + 520, hud.y + 15))
 
         # Buff 显示
+        b = g.buffs
         buffs = []
-        if self.game.buff_active("inv"): buffs.append("INV")
-        if self.game.buff_active("slow"): buffs.append("SLOW")
-        if self.game.buff_active("wrap"): buffs.append("WRAP")
-        if self.game.buff_active("double"): buffs.append("x2")
+        if b.inv: buffs.append("INV")
+        if b.slow: buffs.append("SLOW")
+        if b.wrap: buffs.append("WRAP")
+        if b.double: buffs.append("x2")
         if buffs:
-            btxt = self.font.render("Buffs: " + ",".join(buffs), True, NEON["neon_pink"])
+            btxt = render_text(self.font, "Buffs: " + ",".join(buffs), NEON["neon_pink"])
             self.screen.blit(btxt, (hud.x + 650, hud.y + 15))
 
-        # 玩法区域
-        play = self.game.play
-        pygame.draw.rect(self.screen, (10, 16, 26), play, border_radius=18)
-        pygame.draw.rect(self.screen, NEON["stroke"], play, border_radius=18, width=2)
-        draw_glow_rect(self.screen, play, NEON["stroke"], glow=6, alpha=50)
-
-        # 网格弱化线（更精致）
-        for x in range(play.x, play.right, GRID * 2):
-            pygame.draw.line(self.screen, (14, 22, 34), (x, play.y), (x, play.bottom), 1)
-        for y in range(play.y, play.bottom, GRID * 2):
-            pygame.draw.line(self.screen, (14, 22, 34), (play.x, y), (play.right, y), 1)
+        self.mark(("hud", g.score, self.best, self.settings.difficulty, g.level, tuple(buffs)),
+                  (hud.x, hud.y, W - hud.x, hud.h))
+
+        # 玩法区域（预渲染图层）
+        layer, pos = self.play_layer()
+        self.screen.blit(layer, pos)
+
+        self.draw_cells(g)
+
+        # 暂停 / Game Over 遮罩（连同文字预先合成好）
+        if g.paused:
+            self.screen.blit(self.overlay("paused"), (0, 0))
+            self.mark("paused", (0, 0, W, H))
+        if g.game_over:
+            self.screen.blit(self.overlay("game_over"), (0, 0))
+            self.mark("game_over", (0, 0, W, H))
+
+    def camera(self, g, head):
+        # 棋盘坐标 + 偏移 = 屏幕坐标。棋盘就是 PLAY 时不动；
+        # 大地图让（插值后的）蛇头停在视口中央，到棋盘边缘摄像机就不再往外走
+        if g.play == PLAY:
+            return 0, 0
+        play = g.play
+        cx = min(max(head[0] + GRID // 2 - PLAY.w // 2, play.x), max(play.x, play.right - PLAY.w))
+        cy = min(max(head[1] + GRID // 2 - PLAY.h // 2, play.y), max(play.y, play.bottom - PLAY.h))
+        return PLAY.x - cx, PLAY.y - cy
+
+    def draw_cells(self, g):
+        # 障碍、食物、道具、蛇：都是贴图集里的格子，每一层一次 blits；
+        # 大地图只画视口里的格子，开销只跟窗口大小有关
+        atlas = tile_atlas(SKIN)
+        screen = self.screen
+        items = self.items
+        alpha = 1.0 if g.game_over else self.alpha(g)
+        head = lerp_cell(g.prev_head, g.snake[0], alpha)
+        dx, dy = self.camera(g, head)
+        scrolling = g.play != PLAY
+        if scrolling:
+            # 视口（棋盘坐标）多留一格，半进半出的格子也画上；贴图和光晕裁在视口里
+            view = pygame.Rect(PLAY.x - dx, PLAY.y - dy, PLAY.w, PLAY.h).inflate(2 * GRID, 2 * GRID)
+            screen.set_clip(PLAY)
+            self.draw_grid(screen, pygame.Rect(PLAY).inflate(-4, -4), g.play.x + dx, g.play.y + dy)
+            self.mark(("grid", dx % (2 * GRID), dy % (2 * GRID)), PLAY)
+
+        def visible(cells):
+            return cells_in_view(cells, g.play, view) if scrolling else cells
 
         # 障碍
-        if self.settings.obstacles:
-            for (ox, oy) in self.game.obstacles:
-                r = pygame.Rect(ox, oy, GRID, GRID)
-                pygame.draw.rect(self.screen, NEON["neon_yellow"], r, border_radius=6)
-                pygame.draw.rect(self.screen, (40, 30, 10), r, width=2, border_radius=6)
-
-        # 食物（发光）
-        fx, fy = self.game.food
-        fr = pygame.Rect(fx, fy, GRID, GRID)
-        draw_glow_rect(self.screen, fr, NEON["neon_pink"], radius=10, glow=10, alpha=90)
-        pygame.draw.rect(self.screen, NEON["neon_pink"], fr, border_radius=10)
-
-        # 道具
-        if self.game.powerup:
-            kind, (px, py) = self.game.powerup
-            pr = pygame.Rect(px, py, GRID, GRID)
-            col = NEON["neon_cyan"] if kind in ("inv", "wrap") else (NEON["neon_green"] if kind == "slow" else NEON["neon_pink"])
-            draw_glow_rect(self.screen, pr, col, radius=10, glow=10, alpha=90)
-            pygame.draw.rect(self.screen, col, pr, border_radius=10)
-
-        # 蛇
-        for i, (sx, sy) in enumerate(self.game.snake):
-            r = pygame.Rect(sx, sy, GRID, GRID)
-            if i == 0:
-                col = NEON["neon_green"]
-                draw_glow_rect(self.screen, r, col, radius=10, glow=12, alpha=90)
-                pygame.draw.rect(self.screen, col, r, border_radius=10)
+        if self.settings.obstacles and g.obstacles:
+            cells = visible(g.obstacles)
+            blit_batch(screen, atlas.batch("obstacle", cells, dx, dy))
+            if items is not None:
+                items.update(("obstacle", (ox + dx, oy + dy, GRID, GRID)) for ox, oy in cells)
+
+        # 食物 / 道具（发光）
+        pickups = []
+        if g.food:
+            pickups += atlas.batch("food", [g.food], dx, dy)
+            self.mark("food", pygame.Rect(g.food[0] + dx, g.food[1] + dy, GRID, GRID).inflate(20, 20))
+        if g.powerup:
+            kind, (px, py) = g.powerup
+            pickups += atlas.batch(kind, [(px, py)], dx, dy)
+            self.mark(("powerup", kind), pygame.Rect(px + dx, py + dy, GRID, GRID).inflate(20, 20))
+        if pickups:
+            blit_batch(screen, pickups)
+        if scrolling and g.food and not view.collidepoint(g.food):
+            # 食物在视口外：在视口边上朝它的方向点一个小点
+            fx = min(max(g.food[0] + dx + GRID // 2, PLAY.x + 10), PLAY.right - 10)
+            fy = min(max(g.food[1] + dy + GRID // 2, PLAY.y + 10), PLAY.bottom - 10)
+            pygame.draw.circle(screen, SKIN["food"], (fx, fy), 5)
+            self.mark(("food_pointer", fx, fy), (fx - 5, fy - 5, 10, 10))
+
+        # 蛇：头和尾在上一步与当前步之间插值，逻辑 tick 低于帧率时也能平滑移动
+        blit_batch(screen, atlas.batch("head", [head], dx, dy))
+        self.mark("head", pygame.Rect(head[0] + dx, head[1] + dy, GRID, GRID).inflate(24, 24))
+        if scrolling:
+            # 大地图按格子查 occupied，不遍历整条蛇；蛇头那格只有重叠（无敌穿身）时才当蛇身画
+            body = visible(g.occupied)
+            if g.occupied.get(g.snake[0], 0) < 2 and g.snake[0] in body:
+                body.remove(g.snake[0])
+        else:
+            body = list(itertools.islice(g.snake, 1, None))
+        if g.prev_tail and len(g.snake) > 1:
+            # 只有一节时尾巴就是蛇头，上面已经画过，再补一节身体会盖住它
+            body.append(lerp_cell(g.prev_tail, g.snake[-1], alpha))
+        blit_batch(screen, atlas.batch("body", body, dx, dy))
+        if items is not None:
+            items.update(("body", (sx + dx, sy + dy, GRID, GRID)) for sx, sy in body)
+        if scrolling:
+            screen.set_clip(None)
+
+    def overlay(self, kind):
+        # 全屏半透明遮罩 + 文字，每种状态/窗口尺寸只合成一次
+        key = (kind, self.screen.get_size())
+        surf = self.overlays.get(key)
+        if surf is None:
+            surf = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+            if kind == "paused":
+                surf.fill((0, 0, 0, 140))
+                t = render_text(self.font_big, "PAUSED", NEON["text"])
+                surf.blit(t, t.get_rect(center=(W // 2, H // 2 - 30)))
+                hint = render_text(self.font, "Press Space to resume", NEON["muted"])
+                surf.blit(hint, hint.get_rect(center=(W // 2, H // 2 + 20)))
             else:
-                col = (40, 160, 140)
-                pygame.draw.rect(self.screen, col, r, border_radius=8)
-
-        # 暂停遮罩
-        if self.game.paused:
-            overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 140))
-            self.screen.blit(overlay, (0, 0))
-            t = self.font_big.render("PAUSED", True, NEON["text"])
-            self.screen.blit(t, t.get_rect(center=(W // 2, H // 2 - 30)))
-            hint = self.font.render("Press Space to resume", True, NEON["muted"])
-            self.screen.blit(hint, hint.get_rect(center=(W // 2, H // 2 + 20)))
-
-        # Game Over
-        if self.game.game_over:
-            overlay = pygame.Surface((W, H), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 170))
-            self.screen.blit(overlay, (0, 0))
-            t = self.font_big.render("GAME OVER", True, NEON["danger"])
-            self.screen.blit(t, t.get_rect(center=(W // 2, H // 2 - 40)))
-            hint = self.font.render("R: Restart   M: Menu", True, NEON["text"])
-            self.screen.blit(hint, hint.get_rect(center=(W // 2, H // 2 + 10)))
+                surf.fill((0, 0, 0, 170))
+                t = render_text(self.font_big, "GAME OVER", NEON["danger"])
+                surf.blit(t, t.get_rect(center=(W // 2, H // 2 - 40)))
+                hint = render_text(self.font, "R: Restart   M: Menu", NEON["text"])
+                surf.blit(hint, hint.get_rect(center=(W // 2, H // 2 + 10)))
+            surf = self.overlays[key] = surf.convert_alpha()
+        return surf
 
     # =========================
     # 事件循环
     # =========================
-    def handle_events(self):
-        for e in pygame.event.get():
+    def handle_events(self, events=None):
+        for e in pygame.event.get() if events is None else events:
             if e.type == pygame.QUIT:
                 self.quit()
+            if e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.full_redraw = True
 
             # 控件处理
             for c in self.controls:
@@ -751,59 +855,296 @@ class App:
 
             # 键盘
             if e.type == pygame.KEYDOWN:
+                if e.key == pygame.K_F3:
+                    self.show_dirty = not self.show_dirty
+                elif e.key == pygame.K_F2:
+                    self.set_profiling(self.profiler is None)
                 if self.scene == "game":
                     if e.key in (pygame.K_UP, pygame.K_w):
-                        self.game.set_dir(0, -1)
+                        self.command(self.game.set_dir, 0, -1)
                     elif e.key in (pygame.K_DOWN, pygame.K_s):
-                        self.game.set_dir(0, 1)
+                        self.command(self.game.set_dir, 0, 1)
                     elif e.key in (pygame.K_LEFT, pygame.K_a):
-                        self.game.set_dir(-1, 0)
+                        self.command(self.game.set_dir, -1, 0)
                     elif e.key in (pygame.K_RIGHT, pygame.K_d):
-                        self.game.set_dir(1, 0)
+                        self.command(self.game.set_dir, 1, 0)
                     elif e.key == pygame.K_SPACE:
-                        if not self.game.running:
-                            self.game.start()
+                        if not self.view().running:
+                            self.command(self.game.start)
                         else:
-                            self.game.toggle_pause()
+                            self.command(self.game.toggle_pause)
                     elif e.key == pygame.K_r:
                         self.restart()
                     elif e.key == pygame.K_m:
                         self.to_menu_from_game()
+                    elif e.key == pygame.K_p:
+                        self.set_autopilot(not self.autopilot)
 
     def update(self, dt):
         if self.scene == "game":
-            self.game.update(dt)
-            if self.game.game_over:
+            if self.sim is None:
+                self.game.update(dt)
+            else:
+                # 模拟线程出错退出了就在这里抛出来，和不开 --sim-thread 时 update() 出错一样
+                self.sim.check()
+            # 快照里已经结束了，模拟线程就不会再动这局，直接读写 self.game 没问题
+            if self.view().game_over:
                 # 记录分数一次
                 if self.game.score > 0:
-                    add_top_score(self.game.score)
-                    self.best = max(self.best, self.game.score)
+                    self.record_score()
                     self.game.score = 0  # 防止重复写（简化处理）
         # 其他场景无需 update
 
+    # =========================
+    # 静态图层
+    # =========================
+    def static_layer(self):
+        # 背景、标题和菜单/排行榜里不变的文字只在场景/设置/最高分/窗口尺寸变化时重画一次
+        key = (self.scene, astuple(self.settings), self.best, self.screen.get_size())
+        if key != self.static_key:
+            self.static_key = key
+            self.full_redraw = True
+            surf = pygame.Surface(self.screen.get_size()).convert()
+            self.draw_background(surf)
+            self.draw_title(surf)
+            if self.scene == "menu":
+                self.draw_menu(surf)
+            elif self.scene == "scores":
+                self.draw_scores_static(surf)
+            self.static = surf
+        return self.static
+
+    def play_layer(self):
+        # 玩法区域（底色、描边、光晕、网格线）画在盖住控件的那一层，单独缓存；
+        # 透明底的 SRCALPHA 图层上，pygame 的 alpha 混合对透明像素是直接拷贝，所以贴回屏幕与逐个绘制逐像素一致
+        # 大地图时这里只是视口的底板，网格线跟着摄像机每帧画
+        play = self.game.play if self.game.play == PLAY else PLAY
+        scrolling = self.game.play != PLAY
+        key = (tuple(play), scrolling, self.screen.get_size())
+        if key != self.play_area_key:
+            self.play_area_key = key
+            self.full_redraw = True
+            m = 6  # 光晕宽度
+            area = pygame.Rect(play).inflate(2 * m, 2 * m)
+            surf = pygame.Surface(area.size, pygame.SRCALPHA)
+            self.draw_play_area(surf, pygame.Rect(m, m, play.w, play.h), grid=not scrolling)
+            self.play_area = (surf, area.topleft)
+        return self.play_area
+
+    # =========================
+    # 脏矩形
+    # =========================
+    def mark(self, key, rect):
+        # 记录本帧画过的动态元素；rect 要盖住它画到的所有像素（含光晕）
+        if self.items is not None:
+            self.items.add((key, tuple(rect)))
+
+    def present(self):
+        # 整帧仍画在后台缓冲里，只把与上一帧不同的元素所在区域提交到屏幕：
+        # 某个像素变了，一定是盖住它的某个元素出现/消失/变了，它的 rect 在两帧元素集合的对称差里
+        items = self.items
+        if items is None:
+            self.prev_items = None
+            pygame.display.flip()
+            return
+        screen = self.screen.get_rect()
+        if self.full_redraw or self.prev_items is None:
+            rects = [screen]
+        else:
+            rects = [screen.clip(r) for _, r in items ^ self.prev_items]
+            rects = [r for r in rects if r.w and r.h]
+        self.full_redraw = False
+        if self.show_dirty:
+            for r in rects:
+                pygame.draw.rect(self.screen, NEON["neon_yellow"], r, 1)
+                items.add(("dirty", tuple(r)))
+        self.prev_items = items
+        self.dirty_rects = rects
+        pygame.display.update(rects)
+
     def render(self):
-        self.draw_background()
-        self.draw_title()
+        self.drawn = self.view()  # 这一帧从头到尾画同一份状态
+        self.items = set() if self.display_settings.dirty_rects else None
+        self.screen.blit(self.static_layer(), (0, 0))
         self.draw_controls()
 
-        if self.scene == "menu":
-            self.draw_menu()
-        elif self.scene == "settings":
-            self.draw_settings()
+        # 设置页的文字压在 Segmented 控件上面，只能在控件之后画
+        if self.scene == "settings":
+            self.draw_settings(self.screen)
         elif self.scene == "scores":
             self.draw_scores()
         elif self.scene == "game":
             self.draw_game()
 
-        pygame.display.flip()
+        self.present()
+
+    # =========================
+    # 帧耗时分析（F2）
+    # =========================
+    def set_profiling(self, on, csv_path=None):
+        # 打开时给 handle_events/render/present 和当前局的 step 装上计时包装（实例属性）；
+        # 关掉时删掉包装，主循环调用的又是原来的方法，没有任何额外开销
+        if on and self.profiler is None:
+            p = self.profiler = FrameProfiler(csv_path=csv_path)
+            events = p.timed("events", self.handle_events)
+            update = p.timed("update", self.update)
+            render = p.timed("render", self.render)
+            present = self.present
+
+            def handle_events(events_=None):
+                p.begin()
+                events(events_)
+
+            def render_frame():
+                render()
+                p.end(self.frame_steps(), self.frame_dropped())
+
+            def present_with_overlay():
+                self.draw_profiler()
+                present()
+
+            self.handle_events = handle_events
+            self.update = update
+            self.render = render_frame
+            self.present = present_with_overlay
+            if not self.sim_thread:
+                self.game.step = p.timed("step", self.game.step)
+        elif not on and self.profiler is not None:
+            for name in ("handle_events", "update", "render", "present"):
+                self.__dict__.pop(name, None)
+            self.game.__dict__.pop("step", None)
+            self.profiler.close()
+            self.profiler = None
+            self.profiler_panel = None
+
+    def frame_steps(self):
+        # 本帧推进了几步：单线程看 FixedStep；模拟线程看这一帧和上一帧画的快照差了几步
+        if self.idle():
+            return 0
+        if self.sim is None:
+            return self.game.timer.steps
+        steps = max(0, self.drawn.ticks - self.last_ticks)
+        self.last_ticks = self.drawn.ticks
+        return steps
+
+    def frame_dropped(self):
+        # 本帧因为落后太多被丢掉的游戏时间（毫秒）：单线程看 FixedStep.dropped；模拟线程看它丢掉的整拍多了几个
+        if self.sim is None:
+            return 0.0 if self.idle() else self.game.timer.dropped * 1000.0
+        dropped = self.sim.dropped
+        n = max(0, dropped - self.last_dropped)
+        self.last_dropped = dropped
+        return n * self.drawn.period * 1000.0
+
+    def game_dropped(self):
+        # 这一局到现在一共丢掉的游戏时间（毫秒）
+        if self.sim is None:
+            return self.game.timer.dropped_total * 1000.0
+        return self.sim.dropped * self.drawn.period * 1000.0
+
+    def draw_profiler(self):
+        p = self.profiler
+        rect = pygame.Rect(W - 340, 110, 300, 196 if self.sim is None else 212)
+        graph = pygame.Rect(rect.x + 10, rect.bottom - 56, rect.w - 20, 48)
+        # 文字几帧才刷新一次；数字每次都不一样，不走 TEXT_CACHE，免得把 HUD 的文字挤出去
+        if self.profiler_panel is None or p.count % 10 == 0:
+            panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+            panel.fill((0, 0, 0, 190))
+            pygame.draw.rect(panel, NEON["stroke"], panel.get_rect(), width=1)
+            st = p.stats()
+            rows = [("ms", "p50", "p95", "p99")]
+            rows += [(name, *(f"{v:.2f}" for v in st[name])) for name in ("total", "events", "update", "step", "render")]
+            for i, row in enumerate(rows):
+                col = NEON["text"] if i else NEON["muted"]
+                panel.blit(self.font_small.render(row[0], True, col), (10, 6 + i * 16))
+                for right, cell in zip((150, 215, 280), row[1:]):
+                    t = self.font_small.render(cell, True, col)
+                    panel.blit(t, t.get_rect(topright=(right, 6 + i * 16)))
+            mean, most = st["steps"]
+            t = self.font_small.render(f"steps/frame {mean:.2f} (max {most})", True, NEON["muted"])
+            panel.blit(t, (10, 6 + len(rows) * 16))
+            # 卡顿太久时不补跑、直接丢掉的游戏时间：最近窗口（有丢的帧数）和这一局累计
+            dropped, frames = st["dropped"]
+            t = self.font_small.render(f"dropped {dropped:.1f} ms in {frames} frames (game {self.game_dropped():.0f} ms)",
+                                       True, NEON["danger"] if frames else NEON["muted"])
+            panel.blit(t, (10, 6 + (len(rows) + 1) * 16))
+            if self.sim is not None:
+                # 模拟线程每一步实际开始比计划晚多少
+                t = self.font_small.render("tick jitter p50 %.2f  p99 %.2f  max %.2f" % self.sim.jitter_stats(),
+                                           True, NEON["muted"])
+                panel.blit(t, (10, 6 + (len(rows) + 2) * 16))
+            self.profiler_panel = panel
+        self.screen.blit(self.profiler_panel, rect.topleft)
+
+        # 最近几百帧的总耗时曲线，满高 = 两帧预算（33 ms），虚线 = 一帧预算
+        budget = 1000.0 / FPS
+        y60 = graph.bottom - round(graph.h / 2)
+        for x in range(graph.x, graph.right, 6):
+            self.screen.fill(NEON["stroke"], (x, y60, 3, 1))
+        totals = p.totals()[-graph.w:]
+        if len(totals) > 1:
+            pts = [(graph.right - len(totals) + i, graph.bottom - min(graph.h, round(v / (2 * budget) * graph.h)))
+                   for i, v in enumerate(totals)]
+            pygame.draw.lines(self.screen, NEON["neon_green"], False, pts)
+        self.mark(("profiler", p.count), rect)
+
+    # =========================
+    # 主循环
+    # =========================
+    def idle(self):
+        # 没有模拟在跑：菜单/设置/排行榜，或者游戏还没开始/暂停/结束；
+        # 模拟线程发布了还没画过的快照（比如刚撞死）也不算空闲，先把它画出来
+        if self.sim is not None and self.sim.front is not self.drawn:
+            return False
+        g = self.view()
+        return self.scene != "game" or not g.running or g.paused or g.game_over
+
+    def hover_state(self):
+        return [(getattr(c, "hover", None), getattr(c, "hover_index", None)) for c in self.controls]
+
+    def needs_redraw(self, events, hover):
+        # 空闲时只有输入改变了画面才重画：鼠标移动只在悬停状态变了时算数
+        for e in events:
+            if e.type == pygame.NOEVENT:
+                continue
+            if e.type != pygame.MOUSEMOTION or self.hover_state() != hover:
+                return True
+        return False
 
     def run(self):
+        self.render()
         while True:
-            dt = self.clock.tick(FPS) / 1000.0
-            self.handle_events()
+            if self.idle():
+                # 阻塞等输入，不占 CPU；醒来后重新计时，恢复游戏时第一帧不会把空闲时间算进去
+                events = [pygame.event.wait(IDLE_WAIT)] + pygame.event.get()
+                self.clock.tick()
+                dt = 0.0
+            else:
+                dt = self.clock.tick(FPS) / 1000.0
+                if self.sim is not None:
+                    # 这一帧要占 frame_cost 秒左右；期间有一步到点就先等它跑完再开始，不和它抢 CPU / GIL
+                    self.sim.yield_to_tick(self.frame_cost + 0.001)
+                events = pygame.event.get()
+            start = time.perf_counter()
+            was_idle = self.idle()
+            hover = self.hover_state()
+            self.handle_events(events)
             self.update(dt)
-            self.render()
+            if not (was_idle and self.idle()) or self.needs_redraw(events, hover):
+                self.render()
+                # 最近几帧里最慢的那帧，慢慢衰减
+                self.frame_cost = max(time.perf_counter() - start, self.frame_cost * 0.95)
 
 
 if __name__ == "__main__":
-    App().run()
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="Snake // Neon UI")
+    ap.add_argument("--profile", nargs="?", const="", metavar="CSV",
+                    help="start with the frame profiler (F2) on; with a path, also stream per-frame samples to CSV")
+    ap.add_argument("--sim-thread", action="store_true",
+                    help="run the simulation on its own thread at its exact tick rate; rendering reads snapshots")
+    args = ap.parse_args()
+    app = App()
+    app.sim_thread = args.sim_thread
+    if args.profile is not None:
+        app.set_profiling(True, csv_path=args.profile or None)
+    app.run()
\ No newline at end of file